@@ -1,18 +1,23 @@
-from .core.config import get_settings
-from .core.logging import log
-from .db.redis import get_redis, redis
-from .schemas import (
-    WSEventType,
-    WSEvent
-)
+from importlib import import_module
 
 __version__ = "0.1.0"
 
-__all__ = [
-    "get_settings",
-    "get_redis",
-    "redis",
-    "log",
-    "WSEventType",
-    "WSEvent"
-]
\ No newline at end of file
+# Exports are resolved on first access so that importing the package
+# (e.g. for `app.main:create_app`) does not load settings, Redis or logging.
+_exports = {
+    "get_settings": "app.core.config",
+    "get_redis": "app.db.redis",
+    "redis": "app.db.redis",
+    "log": "app.core.logging",
+    "WSEventType": "app.schemas",
+    "WSEvent": "app.schemas",
+}
+
+__all__ = list(_exports)
+
+def __getattr__(name: str):
+    if name in _exports:
+        value = getattr(import_module(_exports[name]), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
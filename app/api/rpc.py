@@ -0,0 +1,165 @@
+"""
+Request/response RPC over the /ws connection.
+
+Clients send
+    {"type": "auth", "token": "<API_TOKEN>"}
+once (or connect with an `Authorization: Bearer ...` header), then any number of
+    {"type": "request", "id": "1", "method": "POST", "path": "/api/v1/demo/demo",
+     "params": {...}, "body": {...}}
+and get back, in completion order and interleaved with broadcast events,
+    {"type": "response", "id": "1", "status": 200, "body": {...}}
+
+Requests run through the ASGI app in-process, so they hit the same v1
+handlers, validation and admission limits as HTTP calls without another
+connection, HTTP parse or token check.
+"""
+import asyncio
+import json
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlencode
+
+from fastapi import WebSocket
+
+from app.core.auth import PREAUTHENTICATED_SCOPE_KEY, is_valid_token, parse_bearer
+from app.core.config import get_settings
+from app.core.logging import log
+
+MESSAGE_TYPES = ("request", "auth")
+
+def parse_message(text: str) -> Optional[dict]:
+    """Decode an RPC message, None for anything else (plain text, events)"""
+    if not text.startswith("{"):
+        return None
+    try:
+        message = json.loads(text)
+    except ValueError:
+        return None
+    if isinstance(message, dict) and message.get("type") in MESSAGE_TYPES:
+        return message
+    return None
+
+def encode_response(request_id: Any, status: int, body: bytes = b"", content_type: str = "", error: Optional[str] = None) -> str:
+    """Build a response frame, embedding JSON bodies without re-parsing them"""
+    parts = ['{"type":"response","id":', json.dumps(request_id), ',"status":', str(status)]
+    if error is not None:
+        parts += [',"error":', json.dumps(error)]
+    elif body:
+        text = body.decode("utf-8", errors="replace")
+        parts += [',"body":', text if content_type.startswith("application/json") else json.dumps(text)]
+    parts.append("}")
+    return "".join(parts)
+
+class RPCSession:
+    """
+    RPC state for one WebSocket connection.
+    Each request runs in its own task so slow calls don't block the socket;
+    at most `max_in_flight` run at once and the rest are refused with 429.
+    """
+
+    def __init__(self, websocket: WebSocket, send_text: Callable[[str], Awaitable[None]], max_in_flight: Optional[int] = None):
+        settings = get_settings()
+        self.websocket = websocket
+        self.send_text = send_text
+        self.max_in_flight = max_in_flight or settings.WS_RPC_MAX_IN_FLIGHT
+        self.prefix = settings.API_V1_STR
+        self.authenticated = is_valid_token(parse_bearer(websocket.headers.get("authorization")))
+        self.tasks: Set[asyncio.Task] = set()
+
+    async def handle(self, message: dict) -> None:
+        if message["type"] == "auth":
+            self.authenticated = is_valid_token(message.get("token"))
+            reply = {"type": "auth", "ok": self.authenticated}
+            if not self.authenticated:
+                reply["error"] = "Invalid or expired token"
+            await self.send_text(json.dumps(reply))
+            return
+
+        request_id = message.get("id")
+        path = message.get("path")
+        if request_id is None or not isinstance(path, str):
+            await self.send_text(encode_response(request_id, 400, error="Requests need an id and a path"))
+        elif not self.authenticated:
+            await self.send_text(encode_response(request_id, 401, error="Not authenticated"))
+        elif not path.startswith(self.prefix + "/"):
+            await self.send_text(encode_response(request_id, 404, error=f"Only {self.prefix} routes are available"))
+        elif len(self.tasks) >= self.max_in_flight:
+            await self.send_text(encode_response(request_id, 429, error="Too many requests in flight"))
+        else:
+            task = asyncio.create_task(self._call(request_id, message))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def _call(self, request_id: Any, message: dict) -> None:
+        try:
+            status, content_type, body = await self.dispatch(message)
+            frame = encode_response(request_id, status, body, content_type)
+        except Exception as e:
+            log.error(f"WebSocket RPC {message.get('path')} failed: {e}")
+            frame = encode_response(request_id, 500, error="Internal Server Error")
+        try:
+            await self.send_text(frame)
+        except Exception as e:
+            log.debug(f"Failed to send RPC response: {e}")
+
+    async def dispatch(self, message: dict) -> Tuple[int, str, bytes]:
+        """Run one request through the ASGI app"""
+        body = b""
+        headers: List[Tuple[bytes, bytes]] = [(b"host", b"websocket")]
+        if message.get("body") is not None:
+            body = json.dumps(message["body"]).encode()
+            headers += [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+
+        path = message["path"]
+        params = message.get("params") or {}
+        ws_scope = self.websocket.scope
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": str(message.get("method", "GET")).upper(),
+            "scheme": "https" if ws_scope.get("scheme") == "wss" else "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "root_path": ws_scope.get("root_path", ""),
+            "query_string": urlencode(params, doseq=True).encode(),
+            "headers": headers,
+            "client": ws_scope.get("client"),
+            "server": ws_scope.get("server"),
+            "state": {},
+            PREAUTHENTICATED_SCOPE_KEY: True,
+        }
+
+        finished = asyncio.Event()
+        request_sent = False
+
+        async def receive() -> dict:
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await finished.wait()
+            return {"type": "http.disconnect"}
+
+        response: Dict[str, Any] = {"status": 500, "content_type": "", "body": []}
+
+        async def send(event: dict) -> None:
+            if event["type"] == "http.response.start":
+                response["status"] = event["status"]
+                for name, value in event.get("headers", []):
+                    if name.lower() == b"content-type":
+                        response["content_type"] = value.decode("latin-1")
+            elif event["type"] == "http.response.body":
+                response["body"].append(event.get("body", b""))
+
+        try:
+            await ws_scope["app"](scope, receive, send)
+        finally:
+            finished.set()
+        return response["status"], response["content_type"], b"".join(response["body"])
+
+    async def close(self) -> None:
+        """Cancel requests still running when the socket goes away"""
+        for task in list(self.tasks):
+            task.cancel()
+        if self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
@@ -1,20 +1,10 @@
-import os
-from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import StreamingResponse
-from typing import List
-from datetime import datetime, timedelta
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from dotenv import load_dotenv
-from typing import Optional, List, Any, Dict, Literal, Union, Generator
 
-from app.services import service_manager
-from app.db.redis import redis
-from app.db.schemas import RedisSchemas
+from app.core.responses import ModelResponse
 
 router = APIRouter()
 
-load_dotenv()
-
 class DemoRequest(BaseModel):
     demo: str
 
@@ -26,7 +16,8 @@ async def demo_request(
     request: DemoRequest
 ):
     try:
-        return {"demo": request.demo}
+        # Already typed - skip response_model re-validation
+        return ModelResponse(DemoResponse(demo=request.demo))
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,4 +1,4 @@
 from .config import get_settings
-from .logging import log
+from .logging import log, setup_logging
 
-__all__ = ["get_settings"]
\ No newline at end of file
+__all__ = ["get_settings", "log", "setup_logging"]
@@ -0,0 +1,164 @@
+import asyncio
+import time
+from typing import Dict, Iterable, Optional
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import get_settings
+
+class RouteGroup:
+    """
+    Concurrency limit for one group of routes, with a bounded wait queue.
+    Requests over the limit wait up to the queue timeout for a slot;
+    once the queue is full they are shed immediately.
+    """
+
+    def __init__(self, name: str, limit: int, queue_size: int):
+        self.name = name
+        self.limit = limit
+        self.queue_size = queue_size
+        self.active = 0
+        self.waiting = 0
+        self._semaphore = asyncio.Semaphore(limit)
+
+        # Counters
+        self.admitted = 0
+        self.queued = 0
+        self.shed = 0
+        self.queue_timeouts = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+
+    async def acquire(self, timeout: float) -> bool:
+        """Wait for a slot, returns False if the request should be shed"""
+        if not self._semaphore.locked():
+            await self._semaphore.acquire()
+        else:
+            if self.waiting >= self.queue_size:
+                self.shed += 1
+                return False
+
+            self.waiting += 1
+            self.queued += 1
+            start = time.monotonic()
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=timeout)
+            except asyncio.TimeoutError:
+                self.queue_timeouts += 1
+                self.shed += 1
+                return False
+            finally:
+                self.waiting -= 1
+                waited = time.monotonic() - start
+                self.queue_wait_total += waited
+                self.queue_wait_max = max(self.queue_wait_max, waited)
+
+        self.active += 1
+        self.admitted += 1
+        return True
+
+    def release(self) -> None:
+        self.active -= 1
+        self._semaphore.release()
+
+    def get_status(self) -> dict:
+        return {
+            "limit": self.limit,
+            "queue_size": self.queue_size,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "shed": self.shed,
+            "queue_timeouts": self.queue_timeouts,
+            "queue_wait_avg": self.queue_wait_total / self.queued if self.queued else 0.0,
+            "queue_wait_max": self.queue_wait_max,
+        }
+
+class AdmissionController:
+    """
+    Maps request paths to route groups and holds the admission counters.
+    Groups are matched by longest path prefix; unmatched paths fall into
+    the "default" group and exempt paths (health probes) skip admission.
+    """
+
+    def __init__(
+        self,
+        limits: Dict[str, int],
+        default_limit: int,
+        queue_size: int,
+        queue_timeout: float,
+        retry_after: int,
+        exempt_paths: Iterable[str] = ()
+    ):
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.exempt_paths = frozenset(exempt_paths)
+        self.groups: Dict[str, RouteGroup] = {
+            prefix: RouteGroup(prefix, limit, queue_size) for prefix, limit in limits.items()
+        }
+        self.default_group = RouteGroup("default", default_limit, queue_size)
+        # Longest prefix first so nested groups win
+        self._prefixes = sorted(self.groups, key=len, reverse=True)
+
+    @classmethod
+    def from_settings(cls) -> "AdmissionController":
+        settings = get_settings()
+        return cls(
+            limits=settings.ADMISSION_LIMITS,
+            default_limit=settings.ADMISSION_DEFAULT_LIMIT,
+            queue_size=settings.ADMISSION_QUEUE_SIZE,
+            queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT,
+            retry_after=settings.ADMISSION_RETRY_AFTER,
+            exempt_paths=settings.ADMISSION_EXEMPT_PATHS
+        )
+
+    def group_for(self, path: str) -> Optional[RouteGroup]:
+        """Get the route group for a path, None if the path is exempt"""
+        if path in self.exempt_paths:
+            return None
+        for prefix in self._prefixes:
+            if path.startswith(prefix):
+                return self.groups[prefix]
+        return self.default_group
+
+    def get_status(self) -> dict:
+        groups = [*self.groups.values(), self.default_group]
+        return {
+            "shed": sum(group.shed for group in groups),
+            "groups": {group.name: group.get_status() for group in groups}
+        }
+
+class AdmissionControlMiddleware:
+    """
+    ASGI middleware that caps concurrent HTTP requests per route group and
+    fails fast with 503 + Retry-After when over capacity.
+    """
+
+    def __init__(self, app: ASGIApp, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        group = self.controller.group_for(scope["path"])
+        if group is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await group.acquire(self.controller.queue_timeout):
+            response = JSONResponse(
+                {"detail": "Service overloaded, retry later"},
+                status_code=503,
+                headers={"Retry-After": str(self.controller.retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            group.release()
@@ -1,33 +1,47 @@
-from fastapi import Security, HTTPException, status
+from fastapi import Request, Security, HTTPException, status
 from fastapi.security import APIKeyHeader
 from typing import Optional
 
 from app.core.config import get_settings
 
-settings = get_settings()
-
 # Create API key header scheme
 api_key_header = APIKeyHeader(name="Authorization", auto_error=False)
 
-async def verify_token(api_key: Optional[str] = Security(api_key_header)) -> bool:
+# Set on the scope of requests dispatched over an authenticated /ws connection
+PREAUTHENTICATED_SCOPE_KEY = "tetsuo.authenticated"
+
+def is_valid_token(token: Optional[str]) -> bool:
+    """Check a bare API token (without the Bearer scheme)"""
+    return bool(token) and token == get_settings().API_TOKEN
+
+def parse_bearer(api_key: Optional[str]) -> Optional[str]:
+    """Token from a `Bearer <token>` header value, None if malformed"""
+    scheme, _, token = (api_key or "").partition(" ")
+    return token if scheme.lower() == "bearer" else None
+
+async def verify_token(request: Request, api_key: Optional[str] = Security(api_key_header)) -> bool:
     """Verify the API token from the Authorization header"""
+    if request.scope.get(PREAUTHENTICATED_SCOPE_KEY):
+        # WebSocket RPC call - the connection authenticated once already
+        return True
+
     if not api_key:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Authorization header is missing"
         )
-        
-    scheme, _, token = api_key.partition(" ")
-    if scheme.lower() != "bearer":
+
+    token = parse_bearer(api_key)
+    if token is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Authorization header must start with Bearer"
         )
-        
-    if not token or token != settings.API_TOKEN:
+
+    if not is_valid_token(token):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired token"
         )
-        
-    return True
\ No newline at end of file
+
+    return True
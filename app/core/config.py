@@ -1,3 +1,4 @@
+from typing import Dict, List
 from pydantic_settings import BaseSettings
 from functools import lru_cache
 
@@ -7,10 +8,25 @@ class Settings(BaseSettings):
     PROJECT_NAME: str = "Tetsuo Extension API"
     
     # Redis Settings
+    REDIS_BACKEND: str = "redis"  # redis | memory (in-process, single worker only)
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
     REDIS_DB: int = 0
     REDIS_PASSWORD: str | None = None
+    REDIS_SOCKET_TIMEOUT: float = 2.0
+    REDIS_SOCKET_CONNECT_TIMEOUT: float = 2.0
+    # Storage format for RedisSchemas records: json (legacy) | msgpack | hash.
+    # All formats stay readable, switch once every node runs this version.
+    REDIS_CODEC: str = "json"
+
+    # Redis Resilience Settings (BaseService Redis helpers)
+    REDIS_BREAKER_FAILURE_THRESHOLD: int = 5  # Consecutive failures before the circuit opens
+    REDIS_BREAKER_RECOVERY_TIMEOUT: float = 10.0  # Seconds open before a trial call
+    REDIS_BREAKER_HALF_OPEN_MAX_CALLS: int = 1
+    REDIS_LOCAL_CACHE_SIZE: int = 1024  # Keys kept for stale reads during outages
+    REDIS_LOCAL_CACHE_MAX_AGE: float = 300.0  # Oldest value served while Redis is down
+    REDIS_WRITE_BUFFER_SIZE: int = 1000  # Failed writes kept for replay
+    REDIS_REPLAY_BATCH_SIZE: int = 500
     
     # Scraping Settings
     TETSUO_POOL_ADDRESS: str = "2KB3i5uLKhUcjUwq3poxHpuGGqBWYwtTk5eG9E5WnLG6"
@@ -30,6 +46,49 @@ class Settings(BaseSettings):
     # Monitoring Settings
     MIN_WHALE_USD: float = 1000.0
 
+    # Leader Election Settings (singleton services)
+    LEADER_LEASE_TTL: float = 10.0  # Seconds before a dead leader's lease expires
+    LEADER_RETRY_INTERVAL: float = 1.0  # Seconds between follower attempts
+
+    # Service Accounting Settings (reported in ServiceManager.get_status)
+    SERVICE_ACCOUNTING: bool = False  # Attribute tasks and CPU time to services
+    SERVICE_TRACEMALLOC: bool = False  # Also attribute memory with tracemalloc (slow)
+    SERVICE_TRACEMALLOC_FRAMES: int = 10  # Stack depth kept per allocation
+    SERVICE_MEMORY_TTL: float = 30.0  # Seconds to cache the memory snapshot in the status
+
+    # Response Settings
+    RESPONSE_CLASS: str = "pydantic"  # Default response class: pydantic | orjson | json
+
+    # Server Settings (production runner, see app/server.py)
+    SERVER_HOST: str = "127.0.0.1"
+    SERVER_PORT: int = 6502
+    SERVER_UDS: str | None = None  # Bind a Unix socket instead of host/port
+    SERVER_WORKERS: int = 1
+    SERVER_REUSE_PORT: bool = False  # Each worker binds its own SO_REUSEPORT socket
+    SERVER_PRELOAD: bool = True  # Build the app in the master before forking workers
+    SERVER_GRACEFUL_TIMEOUT: float = 30.0  # Seconds to wait for in-flight requests
+    WS_DRAIN_TIMEOUT: float = 5.0  # Seconds to spend sending close frames on shutdown
+    WS_RECONNECT_DELAY: float = 5.0  # Reconnect hint sent to clients on shutdown
+
+    # WebSocket Settings
+    WS_PING_INTERVAL: float = 20.0  # Seconds between protocol-level pings, 0 disables them
+    WS_PONG_TIMEOUT: float = 20.0  # Close clients not answering a ping within this long
+    WS_IDLE_TIMEOUT: float = 0.0  # Evict clients sending no messages this long, 0 disables
+    WS_MAX_CONNECTIONS: int = 10000  # 0 = unlimited
+    WS_MAX_CONNECTIONS_PER_IP: int = 100  # 0 = unlimited
+    WS_RPC_MAX_IN_FLIGHT: int = 16  # Concurrent RPC requests per connection
+    WS_BROADCAST_CONCURRENCY: int = 64  # Clients sent to in parallel per broadcast
+    WS_STATS_TTL: float = 5.0  # Seconds to cache connection percentiles in the status
+
+    # Admission Control Settings
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_LIMITS: Dict[str, int] = {"/api/v1": 64}  # Path prefix -> max concurrent requests
+    ADMISSION_DEFAULT_LIMIT: int = 128  # Limit for paths matching no prefix
+    ADMISSION_QUEUE_SIZE: int = 256  # Requests allowed to wait per group
+    ADMISSION_QUEUE_TIMEOUT: float = 2.0  # Seconds a request may wait for a slot
+    ADMISSION_RETRY_AFTER: int = 1  # Retry-After header on 503
+    ADMISSION_EXEMPT_PATHS: List[str] = ["/", "/health"]
+
     class Config:
         case_sensitive = True
         env_file = ".env"
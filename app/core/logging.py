@@ -2,9 +2,19 @@ import sys
 from loguru import logger
 from app.core.config import get_settings
 
-settings = get_settings()
+_configured = False
 
 def setup_logging():
+    """
+    Attach console and file sinks to the shared logger.
+    Called once at application startup; safe to call again.
+    """
+    global _configured
+    if _configured:
+        return logger
+
+    settings = get_settings()
+
     # Remove default handler
     logger.remove()
     
@@ -34,7 +44,8 @@ def setup_logging():
         retention="1 week"
     )
     
+    _configured = True
     return logger
 
-# Create logger instance
-log = setup_logging()
\ No newline at end of file
+# Shared logger instance - sinks are attached by setup_logging() at startup
+log = logger
@@ -0,0 +1,58 @@
+from typing import Any, Type
+from fastapi.responses import JSONResponse, Response
+from pydantic_core import to_json
+
+from app.core.config import get_settings
+from app.core.logging import log
+from app.schemas.serializers import dump_json
+
+try:
+    import orjson
+except ImportError:  # Optional - only needed for RESPONSE_CLASS=orjson
+    orjson = None
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered by pydantic-core.
+    Handles datetimes, enums and models natively, so handlers can return
+    plain dicts without FastAPI's jsonable_encoder pass.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered by orjson (requires `pip install orjson`)"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+class ModelResponse(Response):
+    """
+    Response for an already-typed Pydantic model.
+
+    Returning a Response from a handler skips FastAPI's response_model
+    validation, so use this when the handler built the model itself:
+
+        return ModelResponse(DemoResponse(demo=request.demo))
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dump_json(content)
+
+RESPONSE_CLASSES = {
+    "pydantic": FastJSONResponse,
+    "orjson": ORJSONResponse,
+    "json": JSONResponse,
+}
+
+def get_response_class() -> Type[JSONResponse]:
+    """Get the default response class selected by RESPONSE_CLASS"""
+    name = get_settings().RESPONSE_CLASS
+    if name not in RESPONSE_CLASSES:
+        raise ValueError(f"Unknown RESPONSE_CLASS {name!r}, expected one of {sorted(RESPONSE_CLASSES)}")
+    if name == "orjson" and orjson is None:
+        log.warning("orjson is not installed, falling back to the pydantic response class")
+        return FastJSONResponse
+    return RESPONSE_CLASSES[name]
@@ -1,10 +1,23 @@
-from .redis import get_redis, RedisManager, redis
+from .redis import get_redis, get_binary_redis, RedisManager, redis, binary_redis
 from .schemas import RedisKeys, RedisSchemas
+from .codecs import RecordCodec, JSONCodec, MsgPackCodec, HashCodec, get_codec
+from .resilience import CircuitBreaker, CircuitOpenError, ResilientRedis, get_resilient_redis
 
 __all__ = [
     "get_redis",
+    "get_binary_redis",
     "RedisManager",
     "redis",
+    "binary_redis",
     "RedisKeys",
-    "RedisSchemas"
+    "RedisSchemas",
+    "RecordCodec",
+    "JSONCodec",
+    "MsgPackCodec",
+    "HashCodec",
+    "get_codec",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "ResilientRedis",
+    "get_resilient_redis"
 ]
\ No newline at end of file
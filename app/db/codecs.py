@@ -0,0 +1,150 @@
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Any, Dict, Mapping, Optional, Union
+import json
+
+from app.core.config import get_settings
+
+# Prefix of every tagged string value, followed by the format id and the
+# schema version. 0xC1 is never emitted by msgpack and cannot start a JSON
+# document, so untagged values are legacy JSON.
+FORMAT_HEADER = b"\xc1"
+
+# Version of the record layout (field names and meaning), independent of
+# the storage format. Bump it when records change shape; readers reject
+# records newer than they understand instead of misreading them.
+SCHEMA_VERSION = 1
+
+# Hash field holding the schema version of hash-encoded records
+HASH_SCHEMA_FIELD = "_v"
+
+Raw = Union[str, bytes]
+
+def to_utc(value: datetime) -> datetime:
+    """Normalise a datetime to UTC - naive values are taken to be UTC, never local time"""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def check_schema_version(version: int) -> None:
+    if not 1 <= version <= SCHEMA_VERSION:
+        raise ValueError(f"Unsupported record schema version {version}, this build reads up to {SCHEMA_VERSION}")
+
+class RecordCodec(ABC):
+    """
+    Encodes flat record dicts (field -> value) for storage in Redis.
+    Datetimes are the only non-JSON type records may contain. They are
+    stored in UTC by every codec, so records read back with timezone-aware
+    UTC datetimes whichever codec wrote them.
+    """
+    name: str = ""
+    # Identifies the storage format in the header of tagged string values
+    format_id: int = 0
+    # Stored as a Redis hash rather than a string value
+    uses_hash: bool = False
+    # Produces bytes that need a client with decode_responses=False
+    binary: bool = False
+
+    @abstractmethod
+    def encode(self, record: Mapping[str, Any]) -> Any:
+        """Encode a record for storage"""
+
+    @abstractmethod
+    def decode(self, raw: Any) -> Dict[str, Any]:
+        """Decode a stored record, raising ValueError if it can't be read"""
+
+class JSONCodec(RecordCodec):
+    """
+    Legacy format - untagged JSON text with ISO timestamps, always schema version 1.
+    Records written before timestamps were normalised may hold naive ones.
+    """
+    name = "json"
+    format_id = 0
+
+    def encode(self, record: Mapping[str, Any]) -> str:
+        return json.dumps({
+            k: to_utc(v).isoformat() if isinstance(v, datetime) else v
+            for k, v in record.items()
+        })
+
+    def decode(self, raw: Raw) -> Dict[str, Any]:
+        return json.loads(raw)
+
+class MsgPackCodec(RecordCodec):
+    """Tagged MessagePack with epoch-second timestamps"""
+    name = "msgpack"
+    format_id = 1
+    binary = True
+
+    def __init__(self):
+        # Imported here so the dependency is only loaded when selected
+        import msgpack
+        self._packb = msgpack.packb
+        self._unpackb = msgpack.unpackb
+        self._prefix = FORMAT_HEADER + bytes([self.format_id, SCHEMA_VERSION])
+
+    def encode(self, record: Mapping[str, Any]) -> bytes:
+        return self._prefix + self._packb({
+            k: to_utc(v).timestamp() if isinstance(v, datetime) else v
+            for k, v in record.items()
+        })
+
+    def decode(self, raw: bytes) -> Dict[str, Any]:
+        if len(raw) < len(self._prefix) or raw[:2] != self._prefix[:2]:
+            raise ValueError("Not a msgpack record or truncated")
+        check_schema_version(raw[2])
+        return self._unpackb(raw[3:])
+
+class HashCodec(RecordCodec):
+    """
+    Redis hash with one field per record field, for records that are read
+    or updated field by field. Values are stored as strings.
+    """
+    name = "hash"
+    format_id = 2
+    uses_hash = True
+
+    def encode(self, record: Mapping[str, Any]) -> Dict[str, Any]:
+        mapping = {HASH_SCHEMA_FIELD: SCHEMA_VERSION}
+        for k, v in record.items():
+            if v is None:
+                continue
+            mapping[k] = repr(to_utc(v).timestamp()) if isinstance(v, datetime) else v
+        return mapping
+
+    def decode(self, raw: Mapping[Raw, Raw]) -> Dict[str, Any]:
+        record = {}
+        version = None
+        for k, v in raw.items():
+            k = k.decode() if isinstance(k, bytes) else k
+            v = v.decode() if isinstance(v, bytes) else v
+            if k == HASH_SCHEMA_FIELD:
+                version = v
+            else:
+                record[k] = v
+        if version is None or not str(version).isdigit():
+            raise ValueError(f"Hash record has no valid {HASH_SCHEMA_FIELD} field")
+        check_schema_version(int(version))
+        return record
+
+CODECS = {codec.name: codec for codec in (JSONCodec, MsgPackCodec, HashCodec)}
+
+@lru_cache(maxsize=None)
+def get_codec(name: Optional[str] = None) -> RecordCodec:
+    """Get a codec by name, defaulting to the one selected by REDIS_CODEC"""
+    name = name or get_settings().REDIS_CODEC
+    if name not in CODECS:
+        raise ValueError(f"Unknown REDIS_CODEC {name!r}, expected one of {sorted(CODECS)}")
+    return CODECS[name]()
+
+def decode_value(raw: Optional[Raw]) -> Optional[Dict[str, Any]]:
+    """Decode a string value written by any codec, detecting the format from its header"""
+    if raw is None:
+        return None
+    if isinstance(raw, bytes) and raw[:1] == FORMAT_HEADER:
+        format_id = raw[1] if len(raw) > 1 else None
+        if format_id == MsgPackCodec.format_id:
+            return get_codec(MsgPackCodec.name).decode(raw)
+        raise ValueError(f"Unknown record format {format_id}")
+    return get_codec(JSONCodec.name).decode(raw)
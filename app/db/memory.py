@@ -0,0 +1,567 @@
+"""
+Embedded in-process stand-in for Redis.
+
+Selected with REDIS_BACKEND=memory for single-node deployments, tests and
+benchmarks that should run without a Redis server. It implements the
+subset of redis-py's asyncio API the service uses: strings with expiry,
+MGET/MSET, counters, hashes, sorted sets, pipelines and pub/sub.
+
+Data lives in the worker's memory - it is neither persisted nor shared
+between worker processes.
+"""
+import asyncio
+import fnmatch
+import heapq
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Set, Tuple
+from redis.exceptions import DataError, ResponseError
+
+WRONGTYPE = "WRONGTYPE Operation against a key holding the wrong kind of value"
+
+def _encode(value: Any) -> bytes:
+    """Encode a key or value the way redis-py does"""
+    if isinstance(value, bytes):
+        return value
+    if isinstance(value, str):
+        return value.encode("utf-8")
+    if isinstance(value, bool) or value is None:
+        raise DataError(f"Invalid input of type: '{type(value).__name__}'. Convert to a bytes, string, int or float first.")
+    if isinstance(value, int):
+        return str(value).encode()
+    if isinstance(value, float):
+        return repr(value).encode()
+    raise DataError(f"Invalid input of type: '{type(value).__name__}'. Convert to a bytes, string, int or float first.")
+
+def _decode(value: Any) -> Any:
+    """Recursively decode bytes in a response, as decode_responses=True does"""
+    if isinstance(value, bytes):
+        return value.decode("utf-8")
+    if isinstance(value, list):
+        return [_decode(v) for v in value]
+    if isinstance(value, tuple):
+        return tuple(_decode(v) for v in value)
+    if isinstance(value, dict):
+        return {_decode(k): _decode(v) for k, v in value.items()}
+    return value
+
+class MemoryStore:
+    """
+    Keyspace plus pub/sub channels. Commands are synchronous so a
+    pipeline executes atomically within the event loop.
+
+    Expired keys are removed when read, and also actively: every write
+    that sets an expiry first sweeps up to SWEEP_BATCH keys whose deadline
+    has passed, so keys that are never read again don't pile up.
+    """
+    SWEEP_BATCH = 20
+
+    def __init__(self):
+        # key -> (type, value); type is "string", "hash" or "zset"
+        self._data: Dict[bytes, Tuple[str, Any]] = {}
+        self._expires: Dict[bytes, float] = {}
+        # (deadline, key) min-heap for active expiry; entries whose deadline
+        # no longer matches _expires are stale and skipped
+        self._deadlines: List[Tuple[float, bytes]] = []
+        self._channels: Dict[bytes, Set["MemoryPubSub"]] = {}
+        self._patterns: Dict[bytes, Set["MemoryPubSub"]] = {}
+
+    # Keyspace helpers
+
+    def _alive(self, key: bytes) -> bool:
+        deadline = self._expires.get(key)
+        if deadline is not None and time.monotonic() >= deadline:
+            self._data.pop(key, None)
+            del self._expires[key]
+            return False
+        return key in self._data
+
+    def _lookup(self, key: Any, kind: str) -> Any:
+        key = _encode(key)
+        if not self._alive(key):
+            return None
+        entry_kind, value = self._data[key]
+        if entry_kind != kind:
+            raise ResponseError(WRONGTYPE)
+        return value
+
+    def _create(self, key: Any, kind: str, factory) -> Any:
+        value = self._lookup(key, kind)
+        if value is None:
+            value = factory()
+            self._data[_encode(key)] = (kind, value)
+        return value
+
+    def _expire_at(self, key: bytes, seconds: Optional[float]) -> None:
+        self.sweep_expired()
+        if seconds is None:
+            self._expires.pop(key, None)
+        else:
+            deadline = time.monotonic() + seconds
+            self._expires[key] = deadline
+            heapq.heappush(self._deadlines, (deadline, key))
+
+    def sweep_expired(self, limit: Optional[int] = None) -> int:
+        """Remove up to `limit` keys past their deadline, returns the number removed"""
+        limit = self.SWEEP_BATCH if limit is None else limit
+        now = time.monotonic()
+        removed = 0
+        while self._deadlines and removed < limit and self._deadlines[0][0] <= now:
+            deadline, key = heapq.heappop(self._deadlines)
+            if self._expires.get(key) == deadline:
+                del self._expires[key]
+                self._data.pop(key, None)
+                removed += 1
+        # Renewed or persisted keys leave stale entries behind - rebuild if they dominate
+        if len(self._deadlines) > 2 * len(self._expires) + 1024:
+            self._deadlines = [(deadline, key) for key, deadline in self._expires.items()]
+            heapq.heapify(self._deadlines)
+        return removed
+
+    # Server
+
+    def ping(self) -> bool:
+        return True
+
+    def flushdb(self) -> bool:
+        self._data.clear()
+        self._expires.clear()
+        self._deadlines.clear()
+        return True
+
+    def dbsize(self) -> int:
+        return sum(1 for key in list(self._data) if self._alive(key))
+
+    # Generic keys
+
+    def delete(self, *keys) -> int:
+        removed = 0
+        for key in map(_encode, keys):
+            if self._alive(key):
+                del self._data[key]
+                self._expires.pop(key, None)
+                removed += 1
+        return removed
+
+    def exists(self, *keys) -> int:
+        return sum(1 for key in map(_encode, keys) if self._alive(key))
+
+    def type(self, key) -> bytes:
+        key = _encode(key)
+        return self._data[key][0].encode() if self._alive(key) else b"none"
+
+    def keys(self, pattern: Any = "*") -> List[bytes]:
+        pattern = _encode(pattern)
+        return [key for key in list(self._data) if self._alive(key) and fnmatch.fnmatchcase(key, pattern)]
+
+    def expire(self, key, seconds: int) -> bool:
+        return self.pexpire(key, int(seconds * 1000))
+
+    def pexpire(self, key, milliseconds: int) -> bool:
+        key = _encode(key)
+        if not self._alive(key):
+            return False
+        self._expire_at(key, milliseconds / 1000)
+        return True
+
+    def persist(self, key) -> bool:
+        key = _encode(key)
+        return self._alive(key) and self._expires.pop(key, None) is not None
+
+    def ttl(self, key) -> int:
+        pttl = self.pttl(key)
+        return pttl if pttl < 0 else round(pttl / 1000)
+
+    def pttl(self, key) -> int:
+        key = _encode(key)
+        if not self._alive(key):
+            return -2
+        deadline = self._expires.get(key)
+        if deadline is None:
+            return -1
+        return max(0, int((deadline - time.monotonic()) * 1000))
+
+    # Strings
+
+    def get(self, key) -> Optional[bytes]:
+        return self._lookup(key, "string")
+
+    def set(self, key, value, ex=None, px=None, nx: bool = False, xx: bool = False,
+            keepttl: bool = False, get: bool = False) -> Any:
+        key, value = _encode(key), _encode(value)
+        exists = self._alive(key)
+        previous = self._lookup(key, "string") if get else None
+        if (nx and exists) or (xx and not exists):
+            return previous if get else None
+
+        self._data[key] = ("string", value)
+        if ex is not None:
+            self._expire_at(key, float(ex))
+        elif px is not None:
+            self._expire_at(key, px / 1000)
+        elif not keepttl:
+            self._expire_at(key, None)
+        return previous if get else True
+
+    def setex(self, key, seconds, value) -> bool:
+        return self.set(key, value, ex=seconds)
+
+    def mget(self, keys, *args) -> List[Optional[bytes]]:
+        keys = [keys, *args] if isinstance(keys, (str, bytes)) else [*keys, *args]
+        return [self.get(key) for key in keys]
+
+    def mset(self, mapping: Dict[Any, Any]) -> bool:
+        for key, value in mapping.items():
+            self.set(key, value)
+        return True
+
+    def incrby(self, key, amount: int = 1) -> int:
+        current = self.get(key)
+        try:
+            value = int(current or 0) + amount
+        except ValueError:
+            raise ResponseError("value is not an integer or out of range")
+        self.set(key, value, keepttl=True)
+        return value
+
+    def incr(self, key, amount: int = 1) -> int:
+        return self.incrby(key, amount)
+
+    def decr(self, key, amount: int = 1) -> int:
+        return self.incrby(key, -amount)
+
+    # Hashes
+
+    def hset(self, name, key=None, value=None, mapping: Optional[Dict] = None, items: Optional[List] = None) -> int:
+        fields = {}
+        if key is not None:
+            fields[key] = value
+        if mapping:
+            fields.update(mapping)
+        if items:
+            fields.update(zip(items[::2], items[1::2]))
+        if not fields:
+            raise DataError("'hset' with no key value pairs")
+
+        data = self._create(name, "hash", dict)
+        added = 0
+        for field, field_value in fields.items():
+            field = _encode(field)
+            added += field not in data
+            data[field] = _encode(field_value)
+        return added
+
+    def hget(self, name, key) -> Optional[bytes]:
+        data = self._lookup(name, "hash")
+        return data.get(_encode(key)) if data else None
+
+    def hmget(self, name, keys, *args) -> List[Optional[bytes]]:
+        keys = [keys, *args] if isinstance(keys, (str, bytes)) else [*keys, *args]
+        return [self.hget(name, key) for key in keys]
+
+    def hgetall(self, name) -> Dict[bytes, bytes]:
+        return dict(self._lookup(name, "hash") or {})
+
+    def hdel(self, name, *keys) -> int:
+        data = self._lookup(name, "hash")
+        if not data:
+            return 0
+        removed = sum(1 for key in map(_encode, keys) if data.pop(key, None) is not None)
+        if not data:
+            self.delete(name)
+        return removed
+
+    def hincrby(self, name, key, amount: int = 1) -> int:
+        data = self._create(name, "hash", dict)
+        value = int(data.get(_encode(key), 0)) + amount
+        data[_encode(key)] = _encode(value)
+        return value
+
+    def hlen(self, name) -> int:
+        return len(self._lookup(name, "hash") or {})
+
+    # Sorted sets
+
+    def zadd(self, name, mapping: Dict[Any, float], nx: bool = False, xx: bool = False) -> int:
+        data = self._create(name, "zset", dict)
+        added = 0
+        for member, score in mapping.items():
+            member = _encode(member)
+            exists = member in data
+            if (nx and exists) or (xx and not exists):
+                continue
+            added += not exists
+            data[member] = float(score)
+        if not data:
+            self.delete(name)
+        return added
+
+    def _sorted(self, name, desc: bool = False) -> List[Tuple[bytes, float]]:
+        data = self._lookup(name, "zset") or {}
+        return sorted(data.items(), key=lambda item: (item[1], item[0]), reverse=desc)
+
+    @staticmethod
+    def _with_scores(items, withscores: bool, score_cast_func=float) -> list:
+        if withscores:
+            return [(member, score_cast_func(score)) for member, score in items]
+        return [member for member, _ in items]
+
+    def zrange(self, name, start: int, end: int, desc: bool = False, withscores: bool = False,
+               score_cast_func=float) -> list:
+        items = self._sorted(name, desc)
+        end = len(items) if end == -1 else (end + 1 if end >= 0 else len(items) + end + 1)
+        return self._with_scores(items[start:end], withscores, score_cast_func)
+
+    def zrevrange(self, name, start: int, end: int, withscores: bool = False, score_cast_func=float) -> list:
+        return self.zrange(name, start, end, desc=True, withscores=withscores, score_cast_func=score_cast_func)
+
+    @staticmethod
+    def _score_bound(bound) -> Tuple[float, bool]:
+        """Parse a ZRANGEBYSCORE bound into (value, exclusive)"""
+        if isinstance(bound, bytes):
+            bound = bound.decode()
+        if isinstance(bound, str):
+            exclusive = bound.startswith("(")
+            bound = bound.lstrip("(")
+            return float({"-inf": "-inf", "+inf": "inf"}.get(bound, bound)), exclusive
+        return float(bound), False
+
+    def _in_range(self, score: float, min, max) -> bool:
+        low, low_excl = self._score_bound(min)
+        high, high_excl = self._score_bound(max)
+        return (score > low if low_excl else score >= low) and (score < high if high_excl else score <= high)
+
+    def zrangebyscore(self, name, min, max, start: Optional[int] = None, num: Optional[int] = None,
+                      withscores: bool = False, score_cast_func=float) -> list:
+        items = [item for item in self._sorted(name) if self._in_range(item[1], min, max)]
+        if start is not None and num is not None:
+            items = items[start:start + num] if num >= 0 else items[start:]
+        return self._with_scores(items, withscores, score_cast_func)
+
+    def zrem(self, name, *members) -> int:
+        data = self._lookup(name, "zset")
+        if not data:
+            return 0
+        removed = sum(1 for member in map(_encode, members) if data.pop(member, None) is not None)
+        if not data:
+            self.delete(name)
+        return removed
+
+    def zremrangebyscore(self, name, min, max) -> int:
+        data = self._lookup(name, "zset")
+        if not data:
+            return 0
+        members = [member for member, score in data.items() if self._in_range(score, min, max)]
+        return self.zrem(name, *members) if members else 0
+
+    def zscore(self, name, member) -> Optional[float]:
+        data = self._lookup(name, "zset")
+        return data.get(_encode(member)) if data else None
+
+    def zcard(self, name) -> int:
+        return len(self._lookup(name, "zset") or {})
+
+    def zincrby(self, name, amount: float, member) -> float:
+        data = self._create(name, "zset", dict)
+        member = _encode(member)
+        data[member] = data.get(member, 0.0) + amount
+        return data[member]
+
+    # Pub/sub
+
+    def publish(self, channel, message) -> int:
+        channel, message = _encode(channel), _encode(message)
+        receivers = 0
+        for pubsub in self._channels.get(channel, ()):
+            pubsub._deliver({"type": "message", "pattern": None, "channel": channel, "data": message})
+            receivers += 1
+        for pattern, subscribers in self._patterns.items():
+            if fnmatch.fnmatchcase(channel, pattern):
+                for pubsub in subscribers:
+                    pubsub._deliver({"type": "pmessage", "pattern": pattern, "channel": channel, "data": message})
+                    receivers += 1
+        return receivers
+
+class MemoryPipeline:
+    """Buffers commands and runs them back to back on execute()"""
+
+    def __init__(self, client: "InMemoryRedis"):
+        self._client = client
+        self._commands: List[Tuple[str, tuple, dict]] = []
+
+    def __getattr__(self, name: str):
+        if name.startswith("_") or not hasattr(MemoryStore, name):
+            raise AttributeError(name)
+
+        def queue(*args, **kwargs) -> "MemoryPipeline":
+            self._commands.append((name, args, kwargs))
+            return self
+        return queue
+
+    async def execute(self, raise_on_error: bool = True) -> list:
+        """Run every command like Redis does, then raise the first error if asked to"""
+        commands, self._commands = self._commands, []
+        results = []
+        for name, args, kwargs in commands:
+            try:
+                results.append(self._client._call(name, *args, **kwargs))
+            except ResponseError as e:
+                results.append(e)
+        if raise_on_error:
+            for result in results:
+                if isinstance(result, ResponseError):
+                    raise result
+        return results
+
+    def reset(self) -> None:
+        self._commands = []
+
+    def __len__(self) -> int:
+        return len(self._commands)
+
+    async def __aenter__(self) -> "MemoryPipeline":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.reset()
+
+class MemoryPubSub:
+    """Subset of redis-py's asyncio PubSub"""
+
+    def __init__(self, client: "InMemoryRedis", ignore_subscribe_messages: bool = False):
+        self._client = client
+        self._store = client._store
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self.ignore_subscribe_messages = ignore_subscribe_messages
+        self.channels: Set[bytes] = set()
+        self.patterns: Set[bytes] = set()
+
+    @property
+    def subscribed(self) -> bool:
+        return bool(self.channels or self.patterns)
+
+    def _deliver(self, message: dict) -> None:
+        self._queue.put_nowait(message)
+
+    def _confirm(self, kind: str, channel: bytes) -> None:
+        self._deliver({
+            "type": kind,
+            "pattern": None,
+            "channel": channel,
+            "data": len(self.channels) + len(self.patterns)
+        })
+
+    async def subscribe(self, *channels) -> None:
+        for channel in map(_encode, channels):
+            self._store._channels.setdefault(channel, set()).add(self)
+            self.channels.add(channel)
+            self._confirm("subscribe", channel)
+
+    async def psubscribe(self, *patterns) -> None:
+        for pattern in map(_encode, patterns):
+            self._store._patterns.setdefault(pattern, set()).add(self)
+            self.patterns.add(pattern)
+            self._confirm("psubscribe", pattern)
+
+    async def unsubscribe(self, *channels) -> None:
+        for channel in list(map(_encode, channels)) or list(self.channels):
+            self._store._channels.get(channel, set()).discard(self)
+            self.channels.discard(channel)
+            self._confirm("unsubscribe", channel)
+
+    async def punsubscribe(self, *patterns) -> None:
+        for pattern in list(map(_encode, patterns)) or list(self.patterns):
+            self._store._patterns.get(pattern, set()).discard(self)
+            self.patterns.discard(pattern)
+            self._confirm("punsubscribe", pattern)
+
+    async def get_message(self, ignore_subscribe_messages: bool = False, timeout: Optional[float] = 0.0) -> Optional[dict]:
+        """Next message, waiting up to `timeout` seconds (None waits forever)"""
+        ignore = ignore_subscribe_messages or self.ignore_subscribe_messages
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                if deadline is None:
+                    message = await self._queue.get()
+                else:
+                    remaining = deadline - time.monotonic()
+                    message = self._queue.get_nowait() if remaining <= 0 else await asyncio.wait_for(self._queue.get(), remaining)
+            except (asyncio.QueueEmpty, asyncio.TimeoutError):
+                return None
+            if ignore and message["type"] not in ("message", "pmessage"):
+                continue
+            return self._client._response(message)
+
+    async def listen(self):
+        while self.subscribed or not self._queue.empty():
+            message = await self.get_message(timeout=None)
+            if message is not None:
+                yield message
+
+    async def aclose(self) -> None:
+        for channel in self.channels:
+            self._store._channels.get(channel, set()).discard(self)
+        for pattern in self.patterns:
+            self._store._patterns.get(pattern, set()).discard(self)
+        self.channels.clear()
+        self.patterns.clear()
+
+    close = aclose
+    reset = aclose
+
+    async def __aenter__(self) -> "MemoryPubSub":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.aclose()
+
+class InMemoryRedis:
+    """
+    Async client over a MemoryStore with redis-py's calling conventions.
+    Several clients can share a store, e.g. a decoded and a binary view.
+    """
+
+    def __init__(self, store: MemoryStore, decode_responses: bool = False):
+        self._store = store
+        self.decode_responses = decode_responses
+
+    def _response(self, value: Any) -> Any:
+        return _decode(value) if self.decode_responses else value
+
+    def _call(self, name: str, *args, **kwargs) -> Any:
+        return self._response(getattr(self._store, name)(*args, **kwargs))
+
+    def __getattr__(self, name: str):
+        if name.startswith("_") or not hasattr(MemoryStore, name):
+            raise AttributeError(f"{type(self).__name__!r} does not support {name!r}")
+
+        async def command(*args, **kwargs):
+            return self._call(name, *args, **kwargs)
+        command.__name__ = name
+        return command
+
+    def binary_view(self) -> "InMemoryRedis":
+        """Client over the same store that returns raw bytes"""
+        return InMemoryRedis(self._store) if self.decode_responses else self
+
+    def pipeline(self, transaction: bool = True) -> MemoryPipeline:
+        return MemoryPipeline(self)
+
+    def pubsub(self, ignore_subscribe_messages: bool = False) -> MemoryPubSub:
+        return MemoryPubSub(self, ignore_subscribe_messages)
+
+    async def close(self) -> None:
+        """No-op - the store outlives its clients"""
+
+    aclose = close
+
+    async def __aenter__(self) -> "InMemoryRedis":
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        pass
+
+@lru_cache()
+def get_memory_store() -> MemoryStore:
+    """Get the process-wide in-memory keyspace"""
+    return MemoryStore()
@@ -2,32 +2,67 @@ from redis.asyncio import Redis, ConnectionPool
 from functools import lru_cache
 from app.core.config import get_settings
 
-settings = get_settings()
-
 @lru_cache()
-def get_redis_pool() -> ConnectionPool:
-    """Get a Redis connection pool"""
+def get_redis_pool(binary: bool = False) -> ConnectionPool:
+    """
+    Get a Redis connection pool.
+    `binary=True` returns raw bytes instead of decoded strings, for binary codecs.
+    """
+    settings = get_settings()
     return ConnectionPool(
         host=settings.REDIS_HOST,
         port=settings.REDIS_PORT,
         db=settings.REDIS_DB,
         password=settings.REDIS_PASSWORD,
-        decode_responses=True,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=settings.REDIS_SOCKET_CONNECT_TIMEOUT,
+        decode_responses=not binary,
         encoding='utf-8'
     )
 
+def _memory_client(binary: bool):
+    """In-process client for REDIS_BACKEND=memory (see app/db/memory.py)"""
+    from app.db.memory import InMemoryRedis, get_memory_store
+    return InMemoryRedis(get_memory_store(), decode_responses=not binary)
+
 @lru_cache()
 def get_redis() -> Redis:
-    """Get a Redis client instance"""
+    """Get a Redis client instance for the configured backend"""
+    if get_settings().REDIS_BACKEND == "memory":
+        return _memory_client(binary=False)
     return Redis(connection_pool=get_redis_pool())
 
+@lru_cache()
+def get_binary_redis() -> Redis:
+    """Get a Redis client instance that returns raw bytes"""
+    if get_settings().REDIS_BACKEND == "memory":
+        return _memory_client(binary=True)
+    return Redis(connection_pool=get_redis_pool(binary=True))
+
+def as_binary_client(client):
+    """
+    The binary (decode_responses=False) counterpart of `client`.
+    Raises TypeError for a decoding client with no known counterpart, as
+    it would fail on binary-encoded values.
+    """
+    if client is get_redis():
+        return get_binary_redis()
+    binary_view = getattr(client, "binary_view", None)
+    if binary_view is not None:
+        return binary_view()
+    pool = getattr(client, "connection_pool", None)
+    if pool is not None and pool.connection_kwargs.get("decode_responses"):
+        raise TypeError("Expected a Redis client with decode_responses=False, e.g. get_binary_redis()")
+    return client
+
 # Async context manager for redis connections
 class RedisManager:
-    def __init__(self):
+    def __init__(self, binary: bool = False):
+        self.binary = binary
         self.redis_client = None
         
     async def __aenter__(self) -> Redis:
-        self.redis_client = get_redis()
+        self.redis_client = get_binary_redis() if self.binary else get_redis()
         return self.redis_client
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
@@ -35,4 +70,5 @@ class RedisManager:
             await self.redis_client.close()
             self.redis_client = None
             
-redis = RedisManager()
\ No newline at end of file
+redis = RedisManager()
+binary_redis = RedisManager(binary=True)
@@ -0,0 +1,338 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, List, Optional, Set, Tuple
+
+from app.core.config import get_settings
+from app.core.logging import log
+from app.db.redis import RedisManager, redis
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling Redis while the circuit is open"""
+
+class CircuitBreaker:
+    """
+    Closed/open/half-open circuit breaker.
+
+    Closed: calls go through, consecutive failures are counted.
+    Open: calls fail fast with CircuitOpenError until recovery_timeout passes.
+    Half-open: up to half_open_max_calls trial calls; one success closes
+    the circuit, a failure opens it again.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, recovery_timeout: float, half_open_max_calls: int = 1):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._half_open_calls = 0
+
+        # Counters
+        self.rejected = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._state = self.HALF_OPEN
+            self._half_open_calls = 0
+        return self._state
+
+    def allow(self) -> bool:
+        """Check whether a call may go through right now"""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and self._half_open_calls < self.half_open_max_calls:
+            self._half_open_calls += 1
+            return True
+        return False
+
+    def release_trial(self) -> None:
+        """Free a half-open slot taken by a call that never finished (e.g. cancelled)"""
+        if self._state == self.HALF_OPEN and self._half_open_calls > 0:
+            self._half_open_calls -= 1
+
+    def record_success(self) -> bool:
+        """Record a successful call, returns True if this closed the circuit"""
+        recovered = self._state != self.CLOSED
+        self._state = self.CLOSED
+        self._failures = 0
+        self._half_open_calls = 0
+        if recovered:
+            log.info("Redis circuit closed - Redis reachable again")
+        return recovered
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            if self._state != self.OPEN:
+                log.warning(f"Redis circuit opened after {self._failures} consecutive failures")
+                self.times_opened += 1
+            self._state = self.OPEN
+            self._opened_at = time.monotonic()
+            self._half_open_calls = 0
+
+    async def call(self, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """Run `fn` through the breaker"""
+        if not self.allow():
+            self.rejected += 1
+            raise CircuitOpenError("Redis circuit is open")
+        try:
+            result = await fn(*args, **kwargs)
+        except Exception:
+            self.record_failure()
+            raise
+        except BaseException:
+            # Cancelled - says nothing about Redis, but the trial slot must be freed
+            self.release_trial()
+            raise
+        self.record_success()
+        return result
+
+    def get_status(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+        }
+
+class LocalCache:
+    """Bounded LRU of the last known value per key, kept for at most max_age seconds"""
+
+    def __init__(self, max_size: int, max_age: float):
+        self.max_size = max_size
+        self.max_age = max_age
+        self._items: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Returns (hit, value)"""
+        item = self._items.get(key)
+        if item is None:
+            return False, None
+        value, stored_at = item
+        if time.monotonic() - stored_at > self.max_age:
+            del self._items[key]
+            return False, None
+        self._items.move_to_end(key)
+        return True, value
+
+    def set(self, key: str, value: Any) -> None:
+        if self.max_size <= 0:
+            return
+        self._items[key] = (value, time.monotonic())
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+class WriteBuffer:
+    """
+    Bounded buffer of failed writes, coalesced by key (latest value wins).
+    When full the oldest write is dropped.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._items: "OrderedDict[str, Tuple[Any, Optional[int], float]]" = OrderedDict()
+        self.dropped = 0
+
+    def add(self, key: str, value: Any, ex: Optional[int], buffered_at: Optional[float] = None) -> None:
+        if self.max_size <= 0:
+            self.dropped += 1
+            return
+        self._items[key] = (value, ex, buffered_at or time.monotonic())
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+            self.dropped += 1
+
+    def discard(self, key: str) -> None:
+        self._items.pop(key, None)
+
+    def drain(self) -> List[Tuple[str, Any, Optional[int], float]]:
+        items = [(key, *item) for key, item in self._items.items()]
+        self._items.clear()
+        return items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._items
+
+class ResilientRedis:
+    """
+    GET/SET wrapper used by the BaseService Redis helpers.
+
+    Calls go through a circuit breaker so an unhealthy Redis fails fast.
+    Successful reads and writes refresh a local cache that is served
+    (possibly stale) when Redis is unavailable; failed writes are buffered
+    and replayed in pipelined batches once Redis recovers.
+    """
+
+    def __init__(
+        self,
+        breaker: CircuitBreaker,
+        cache: LocalCache,
+        write_buffer: WriteBuffer,
+        replay_batch_size: int = 500,
+        manager: RedisManager = redis
+    ):
+        self.breaker = breaker
+        self.cache = cache
+        self.write_buffer = write_buffer
+        self.replay_batch_size = replay_batch_size
+        self.manager = manager
+        self._replay_task: Optional[asyncio.Task] = None
+        # Keys drained from the buffer whose replay hasn't finished yet
+        self._replaying: Set[str] = set()
+        self._replay_done = asyncio.Event()
+
+        # Counters
+        self.stale_reads = 0
+        self.buffered_writes = 0
+        self.replayed_writes = 0
+
+    async def get(self, key: str) -> Optional[Any]:
+        if key in self.write_buffer or key in self._replaying:
+            # Redis still holds an older value than the one we are writing
+            hit, value = self.cache.get(key)
+            if hit:
+                return value
+        try:
+            value = await self.breaker.call(self._get, key)
+        except Exception as e:
+            if not isinstance(e, CircuitOpenError):
+                log.error(f"Redis get error: {e}")
+            hit, value = self.cache.get(key)
+            if hit:
+                self.stale_reads += 1
+            return value
+
+        self.cache.set(key, value)
+        self._maybe_replay()
+        return value
+
+    async def set(self, key: str, value: Any, ex: Optional[int] = None) -> bool:
+        """Returns False if the write failed and was buffered for replay"""
+        # Readers see the latest value even while the write is buffered
+        self.cache.set(key, value)
+        # This write supersedes any buffered one - and must land after one being replayed
+        self.write_buffer.discard(key)
+        while key in self._replaying:
+            await self._replay_done.wait()
+        try:
+            await self.breaker.call(self._set, key, value, ex)
+        except Exception as e:
+            if not isinstance(e, CircuitOpenError):
+                log.error(f"Redis set error: {e}")
+            self.cache.set(key, value)
+            self.write_buffer.add(key, value, ex)
+            self.buffered_writes += 1
+            return False
+
+        # A newer value is in Redis, don't replay an older one over it
+        self.write_buffer.discard(key)
+        self._maybe_replay()
+        return True
+
+    async def _get(self, key: str) -> Optional[Any]:
+        async with self.manager as r:
+            return await r.get(key)
+
+    async def _set(self, key: str, value: Any, ex: Optional[int]) -> None:
+        async with self.manager as r:
+            await r.set(key, value, ex=ex)
+
+    def _maybe_replay(self) -> None:
+        if self.write_buffer and (self._replay_task is None or self._replay_task.done()):
+            self._replay_task = asyncio.create_task(self.replay())
+
+    async def replay(self) -> int:
+        """Replay buffered writes in pipelined batches, returns the number written"""
+        pending = self.write_buffer.drain()
+        written = 0
+        if not pending:
+            return written
+
+        # set() calls for these keys wait until the replay is over
+        self._replaying.update(key for key, *_ in pending)
+        self._replay_done.clear()
+        try:
+            while pending:
+                batch, pending = pending[:self.replay_batch_size], pending[self.replay_batch_size:]
+                try:
+                    written += await self.breaker.call(self._write_batch, batch)
+                except Exception as e:
+                    log.error(f"Redis write replay failed, {len(batch) + len(pending)} writes re-buffered: {e}")
+                    for key, value, ex, buffered_at in batch + pending:
+                        # Keep writes that arrived while replaying
+                        if key not in self.write_buffer:
+                            self.write_buffer.add(key, value, ex, buffered_at)
+                    break
+        finally:
+            self._replaying.clear()
+            self._replay_done.set()
+
+        if written:
+            self.replayed_writes += written
+            log.info(f"Replayed {written} buffered Redis writes")
+        return written
+
+    async def _write_batch(self, batch: List[Tuple[str, Any, Optional[int], float]]) -> int:
+        now = time.monotonic()
+        written = 0
+        async with self.manager as r:
+            pipe = r.pipeline(transaction=False)
+            for key, value, ex, buffered_at in batch:
+                if ex is not None:
+                    # Preserve the original expiry deadline
+                    remaining = ex - (now - buffered_at)
+                    if remaining <= 0:
+                        continue
+                    ex = math.ceil(remaining)
+                pipe.set(key, value, ex=ex)
+                written += 1
+            if written:
+                await pipe.execute()
+        return written
+
+    def get_status(self) -> dict:
+        return {
+            **self.breaker.get_status(),
+            "cached_keys": len(self.cache),
+            "stale_reads": self.stale_reads,
+            "pending_writes": len(self.write_buffer),
+            "buffered_writes": self.buffered_writes,
+            "dropped_writes": self.write_buffer.dropped,
+            "replayed_writes": self.replayed_writes,
+        }
+
+@lru_cache()
+def get_resilient_redis() -> ResilientRedis:
+    """Get the shared ResilientRedis instance configured from settings"""
+    settings = get_settings()
+    return ResilientRedis(
+        breaker=CircuitBreaker(
+            failure_threshold=settings.REDIS_BREAKER_FAILURE_THRESHOLD,
+            recovery_timeout=settings.REDIS_BREAKER_RECOVERY_TIMEOUT,
+            half_open_max_calls=settings.REDIS_BREAKER_HALF_OPEN_MAX_CALLS
+        ),
+        cache=LocalCache(
+            max_size=settings.REDIS_LOCAL_CACHE_SIZE,
+            max_age=settings.REDIS_LOCAL_CACHE_MAX_AGE
+        ),
+        write_buffer=WriteBuffer(max_size=settings.REDIS_WRITE_BUFFER_SIZE),
+        replay_batch_size=settings.REDIS_REPLAY_BATCH_SIZE
+    )
@@ -1,44 +1,86 @@
-from datetime import datetime, timedelta
-from typing import Optional
-import json
+from typing import Any, Dict, Optional
+from redis.exceptions import ResponseError
 from app.schemas import DemoData
 from app.core.logging import log
+from app.db.codecs import RecordCodec, decode_value, get_codec
+from app.db.redis import as_binary_client
 
 class RedisKeys:
     """Redis key patterns for different data types"""
     
     @staticmethod
-    def demo_key(test :str) -> str:
-        return f"demo:{test.value}:latest"
+    def demo_key(test: str) -> str:
+        return f"demo:{test}:latest"
 
 class RedisSchemas:
-    """Methods for storing and retrieving data from Redis"""
+    """
+    Methods for storing and retrieving data from Redis.
+
+    Records are written with the codec selected by REDIS_CODEC and read
+    back whatever format they were written in, so codecs can be switched
+    during a rolling deploy. Any client can be passed in: records are
+    always accessed through its binary counterpart (see as_binary_client),
+    since a decoding client can't read msgpack values.
+    """
     
     @staticmethod
-    async def store_demo(redis, data: DemoData) -> None:
-        demo_key = RedisKeys.demo_key(data.value)
-        await redis.set(
-            demo_key,
-            json.dumps({
+    async def store_record(redis, key: str, record: Dict[str, Any], ex: Optional[int] = None,
+                           codec: Optional[RecordCodec] = None) -> None:
+        """Store a flat record under `key`"""
+        redis = as_binary_client(redis)
+        codec = codec or get_codec()
+        if not codec.uses_hash:
+            await redis.set(key, codec.encode(record), ex=ex)
+            return
+
+        # Replace the whole hash so stale fields (or a string value) don't survive
+        pipe = redis.pipeline(transaction=True)
+        pipe.delete(key)
+        pipe.hset(key, mapping=codec.encode(record))
+        if ex:
+            pipe.expire(key, ex)
+        await pipe.execute()
+
+    @staticmethod
+    async def load_record(redis, key: str, codec: Optional[RecordCodec] = None) -> Optional[Dict[str, Any]]:
+        """Load a record stored by any codec, None if missing"""
+        redis = as_binary_client(redis)
+        codec = codec or get_codec()
+        hash_codec = get_codec("hash")
+        try:
+            if codec.uses_hash:
+                raw = await redis.hgetall(key)
+                return hash_codec.decode(raw) if raw else None
+            return decode_value(await redis.get(key))
+        except ResponseError as e:
+            if "WRONGTYPE" not in str(e):
+                raise
+        # Written with the other storage type (string vs hash)
+        if codec.uses_hash:
+            return decode_value(await redis.get(key))
+        raw = await redis.hgetall(key)
+        return hash_codec.decode(raw) if raw else None
+
+    @staticmethod
+    async def store_demo(redis, data: DemoData, ex: Optional[int] = None) -> None:
+        await RedisSchemas.store_record(
+            redis,
+            RedisKeys.demo_key(data.value),
+            {
                 "value": data.value,
-                "timestamp": data.timestamp.isoformat()
-            })
+                "timestamp": data.timestamp
+            },
+            ex=ex
         )
 
     @staticmethod
     async def get_demo(redis, test_val) -> Optional[DemoData]:
-        """Get latest sentiment for platform"""
-        data = await redis.get(RedisKeys.demo_key(test_val))
-        if not data:
-            return None
-            
+        """Get latest demo record"""
         try:
-            parsed = json.loads(data)
-            return DemoData(
-                value=parsed["value"],
-                timestamp=datetime.fromisoformat(parsed["timestamp"])
-            )
-        except Exception as e:
-            log.error(f"Error parsing sentiment data: {e}")
+            record = await RedisSchemas.load_record(redis, RedisKeys.demo_key(test_val))
+            if not record:
+                return None
+            return DemoData(**record)
+        except (ValueError, TypeError) as e:
+            log.error(f"Error parsing demo data: {e}")
             return None
-            
\ No newline at end of file
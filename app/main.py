@@ -1,16 +1,16 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
-from fastapi.security import HTTPBearer
+from fastapi import FastAPI, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.datastructures import Default
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.openapi.utils import get_openapi
 from contextlib import asynccontextmanager
 import sys
 
-from app.core import get_settings, log
-from app.db import redis
-from app.services import service_manager
-from app.api import v1_router
-
-settings = get_settings()
+from app.core import get_settings, log, setup_logging
+from app.core.admission import AdmissionController, AdmissionControlMiddleware
+from app.core.auth import is_valid_token, parse_bearer
+from app.core.responses import get_response_class
+from app.db import redis, get_resilient_redis
+from app.schemas import dump_json
+from app.services import get_service_manager
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -20,25 +20,26 @@ async def lifespan(app: FastAPI):
     """
     # Startup
     try:
+        setup_logging()
         log.info("Starting up FastAPI service...")
-        
+
         # Test Redis connection
         log.info("Testing Redis connection...")
         async with redis as r:
             await r.ping()
             log.info("✓ Redis connection successful")
-            
+
         # Register and start services
         log.info("Initializing services...")
         from app.services.registry import service_registry
         await service_registry.register_all()
         log.info("✓ Services registered")
-        
-        await service_manager.start_services()
+
+        await get_service_manager().start_services()
         log.info("✓ Services started")
-        
+
         log.info("Startup complete - ready to handle requests")
-        
+
     except Exception as e:
         log.error(f"Fatal error during startup: {str(e)}")
         # Print full traceback for debugging
@@ -46,107 +47,166 @@ async def lifespan(app: FastAPI):
         traceback.print_exc()
         # Force exit on startup failure
         sys.exit(1)
-    
+
     yield
-    
+
     # Shutdown
     try:
         log.info("Shutting down FastAPI service...")
-        await service_manager.stop_services()
+        await get_service_manager().stop_services()
         log.info("Services stopped successfully")
     except Exception as e:
         log.error(f"Error during shutdown: {e}")
         sys.exit(1)
 
-# Create FastAPI app
-app = FastAPI(
-    servers=[{"url": "https://localhost", "description": "core"}],
-    title=settings.PROJECT_NAME,
-    version="0.1.0",
-    lifespan=lifespan,
-    # Add debug flag based on environment
-    debug=True  # TODO: Set from environment
-)
-
-security = HTTPBearer()
-
-# CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # In production, replace with specific origins
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-
-# Basic health check endpoint
-@app.get("/")
+# Basic health check endpoint - the body never changes, so render it once
+ROOT_BODY = dump_json({
+    "status": "online",
+    "version": "0.1.0"
+})
+
 async def root():
     """Basic health check endpoint"""
-    return {
-        "status": "online",
-        "version": "0.1.0"
-    }
+    return Response(ROOT_BODY, media_type="application/json")
 
 # Detailed health check
-@app.post("/health")
-@app.get("/health")
-async def health():
-    """Detailed health check"""
+async def health(request: Request):
+    """
+    Detailed health check.
+    Per-client WebSocket stats are only added for `?connections=true`
+    with a valid Bearer token.
+    """
     status = {
         "service": "ok",
         "redis": False
     }
-    
+
     try:
         async with redis as r:
             await r.ping()
             status["redis"] = True
     except Exception as e:
         log.error(f"Redis health check failed: {e}")
-    
+    status["redis_circuit"] = get_resilient_redis().get_status()
+
     # Add service status
     try:
-        service_status = await service_manager.get_status()
+        include_connections = (
+            request.query_params.get("connections") == "true"
+            and is_valid_token(parse_bearer(request.headers.get("authorization")))
+        )
+        service_status = await get_service_manager().get_status(include_connections=include_connections)
         status["services"] = service_status
     except Exception as e:
         log.error(f"Service status check failed: {e}")
         status["services"] = {"error": str(e)}
-    
-    return status
+
+    admission = getattr(request.app.state, "admission", None)
+    if admission is not None:
+        status["admission"] = admission.get_status()
+
+    # Rendered directly with the RESPONSE_CLASS renderer, skipping FastAPI's jsonable_encoder walk
+    return get_response_class()(status)
 
 # WebSocket endpoint
-@app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
-    """WebSocket endpoint for real-time updates"""
+    """
+    WebSocket endpoint for real-time updates.
+    Also serves request/response RPC to the v1 API, see app/api/rpc.py.
+    """
+    from app.api.rpc import RPCSession, parse_message
+
+    service_manager = get_service_manager()
+    if not await service_manager.register_websocket(websocket):
+        return
+    rpc = RPCSession(websocket, lambda text: service_manager.send_text(websocket, text))
     try:
-        await service_manager.register_websocket(websocket)
         while True:
             try:
                 data = await websocket.receive_text()
-                await websocket.send_text(f"Message received: {data}")
+                if await service_manager.handle_heartbeat(websocket, data):
+                    continue
+                message = parse_message(data)
+                if message is not None:
+                    await rpc.handle(message)
+                else:
+                    await service_manager.send_text(websocket, f"Message received: {data}")
             except WebSocketDisconnect:
                 break
             except Exception as e:
                 log.error(f"WebSocket error: {e}")
                 break
     finally:
+        await rpc.close()
         await service_manager.remove_websocket(websocket)
 
-# Include API routers
-app.include_router(
-    v1_router,
-    prefix=settings.API_V1_STR
-)
+def create_app() -> FastAPI:
+    """
+    Build the FastAPI application.
+
+    Nothing here touches Redis, logging sinks or services - all of that
+    happens in `lifespan` once the server starts. Use with
+    `uvicorn --factory app.main:create_app`.
+    """
+    settings = get_settings()
+
+    app = FastAPI(
+        servers=[{"url": "https://localhost", "description": "core"}],
+        title=settings.PROJECT_NAME,
+        version="0.1.0",
+        lifespan=lifespan,
+        # Wrapped in Default() so routes with a response_model keep
+        # FastAPI's own direct-to-JSON serialization
+        default_response_class=Default(get_response_class()),
+        # Add debug flag based on environment
+        debug=True  # TODO: Set from environment
+    )
+
+    # Load shedding - added before CORS so 503s still carry CORS headers
+    if settings.ADMISSION_ENABLED:
+        app.state.admission = AdmissionController.from_settings()
+        app.add_middleware(AdmissionControlMiddleware, controller=app.state.admission)
+
+    # CORS middleware
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],  # In production, replace with specific origins
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    app.add_api_route("/", root, methods=["GET"])
+    app.add_api_route("/health", health, methods=["GET", "POST"])
+    app.add_api_websocket_route("/ws", websocket_endpoint)
+
+    # Include API routers - imported here so endpoint modules load with the app
+    from app.api import v1_router
+    app.include_router(
+        v1_router,
+        prefix=settings.API_V1_STR
+    )
+
+    return app
+
+def __getattr__(name: str):
+    # Keep `app.main:app` working for existing uvicorn invocations
+    if name == "app":
+        app = create_app()
+        globals()["app"] = app
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
-        "app.main:app",
+        "app.main:create_app",
+        factory=True,
         host="127.0.0.1",
         port=6502,
         #uds="/tmp/uvicorn.sock",
         reload=True,
+        ws_ping_interval=get_settings().WS_PING_INTERVAL or None,
+        ws_ping_timeout=get_settings().WS_PONG_TIMEOUT or None,
         log_level="debug"
     )
@@ -3,9 +3,12 @@ from .models import (
     WSEventType,
     WSEvent,
 )
+from .serializers import get_type_adapter, dump_json
 
 __all__ = [
     "DemoData",
     "WSEventType",
     "WSEvent",
+    "get_type_adapter",
+    "dump_json",
 ]
\ No newline at end of file
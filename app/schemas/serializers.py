@@ -0,0 +1,25 @@
+from functools import lru_cache
+from typing import Any, Optional
+from pydantic import BaseModel, TypeAdapter
+from pydantic_core import to_json
+
+@lru_cache(maxsize=None)
+def get_type_adapter(tp: Any) -> TypeAdapter:
+    """
+    Get a cached TypeAdapter for non-model types (e.g. `List[DemoData]`).
+    Building one compiles a validator and serializer, so it is done once per type.
+    """
+    return TypeAdapter(tp)
+
+def dump_json(obj: Any, tp: Optional[Any] = None) -> bytes:
+    """
+    Serialize to JSON bytes without validating.
+    Models use the serializer pydantic compiles when the class is defined,
+    `tp` selects a cached adapter (built on first use), anything else goes
+    through pydantic-core's generic encoder.
+    """
+    if tp is not None:
+        return get_type_adapter(tp).dump_json(obj)
+    if isinstance(obj, BaseModel):
+        return obj.__pydantic_serializer__.to_json(obj)
+    return to_json(obj)
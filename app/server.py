@@ -0,0 +1,267 @@
+"""
+Production server runner.
+
+Runs the API with one or more uvicorn workers, optionally preloading the
+app before forking and binding either a shared TCP socket, per-worker
+SO_REUSEPORT sockets or a Unix socket. Defaults come from settings
+(SERVER_*), command line flags override them:
+
+    python -m app.server --workers 4 --host 0.0.0.0 --port 6502
+    python -m app.server --workers 4 --uds /run/tetsuo.sock
+
+On SIGTERM/SIGINT each worker stops accepting connections, sends a close
+frame with a reconnect hint to its WebSocket clients, waits up to
+SERVER_GRACEFUL_TIMEOUT for in-flight requests and then runs the lifespan
+shutdown (which stops the services).
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import sys
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+import uvicorn
+
+from app.core import get_settings, log
+
+# uvicorn exits workers with this code when startup fails
+STARTUP_FAILURE = 3
+
+class GracefulServer(uvicorn.Server):
+    """uvicorn server that drains WebSocket clients before shutting down"""
+
+    async def shutdown(self, sockets=None) -> None:
+        # Stop accepting new connections before draining existing ones
+        for server in self.servers:
+            server.close()
+
+        settings = get_settings()
+        from app.services import get_service_manager
+        reason = json.dumps({"reconnect": True, "retry_after": settings.WS_RECONNECT_DELAY})
+        await get_service_manager().close_websockets(
+            code=1012,
+            reason=reason,
+            timeout=settings.WS_DRAIN_TIMEOUT
+        )
+
+        # Waits for in-flight requests, then runs the lifespan shutdown
+        await super().shutdown(sockets=sockets)
+
+def build_config(args: argparse.Namespace) -> uvicorn.Config:
+    """Build the uvicorn config, preloading the app if requested"""
+    settings = get_settings()
+
+    if args.preload:
+        from app.main import create_app
+        app, factory = create_app(), False
+    else:
+        app, factory = "app.main:create_app", True
+
+    return uvicorn.Config(
+        app,
+        factory=factory,
+        host=args.host,
+        port=args.port,
+        uds=args.uds,
+        log_level=settings.LOG_LEVEL.lower(),
+        timeout_graceful_shutdown=args.graceful_timeout,
+        # Protocol-level keepalive - answered by browsers and client libraries automatically
+        ws_ping_interval=settings.WS_PING_INTERVAL or None,
+        ws_ping_timeout=settings.WS_PONG_TIMEOUT or None,
+        proxy_headers=True
+    )
+
+def bind_socket(config: uvicorn.Config) -> socket.socket:
+    """Bind the shared listening socket in the master process"""
+    if config.uds and os.path.exists(config.uds):
+        os.unlink(config.uds)
+    return config.bind_socket()
+
+def bind_reuseport_socket(config: uvicorn.Config) -> socket.socket:
+    """Bind a per-worker SO_REUSEPORT socket so the kernel balances accepts"""
+    family = socket.AF_INET6 if config.host and ":" in config.host else socket.AF_INET
+    sock = socket.socket(family=family)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((config.host, config.port))
+    sock.set_inheritable(True)
+    return sock
+
+class Supervisor:
+    """
+    Pre-fork worker supervisor.
+    Forks the workers, restarts any that crash and forwards shutdown
+    signals, killing workers that outlive the graceful deadline.
+
+    Restarts back off exponentially with the number of recent crashes per
+    worker, and if workers crash more than RESTART_LIMIT times each within
+    RESTART_WINDOW seconds the supervisor gives up and shuts down.
+    """
+    RESTART_BACKOFF = 0.5  # Seconds before the first restart
+    RESTART_BACKOFF_MAX = 30.0
+    RESTART_WINDOW = 60.0
+    RESTART_LIMIT = 5
+
+    def __init__(self, config: uvicorn.Config, workers: int, sock: Optional[socket.socket], graceful_timeout: float):
+        self.config = config
+        self.workers = workers
+        self.sock = sock
+        self.graceful_timeout = graceful_timeout
+        self.children: Dict[int, float] = {}
+        self.stopping = False
+        self.deadline: Optional[float] = None
+        self.exit_code = 0
+        self.crashes: Deque[float] = deque()
+        self.pending: List[float] = []  # Times at which to respawn crashed workers
+
+    def spawn(self) -> None:
+        pid = os.fork()
+        if pid:
+            self.children[pid] = time.monotonic()
+            return
+
+        # Worker process - uvicorn installs its own signal handlers
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, signal.SIG_DFL)
+        code = 0
+        try:
+            sock = self.sock or bind_reuseport_socket(self.config)
+            GracefulServer(self.config).run(sockets=[sock])
+        except SystemExit as e:
+            code = e.code if isinstance(e.code, int) else 1
+        except BaseException as e:
+            log.error(f"Worker {os.getpid()} crashed: {e}")
+            code = 1
+        finally:
+            os._exit(code)
+
+    def handle_signal(self, sig: int, frame) -> None:
+        if self.stopping:
+            return
+        log.info(f"Received {signal.Signals(sig).name}, stopping {len(self.children)} workers...")
+        self.stopping = True
+        self.pending.clear()
+        # Leave a little headroom for the WebSocket drain and lifespan shutdown
+        self.deadline = time.monotonic() + self.graceful_timeout + 10.0
+        for pid in self.children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def restart_delay(self) -> Optional[float]:
+        """Record a crash, returns the delay before respawning or None to give up"""
+        now = time.monotonic()
+        while self.crashes and now - self.crashes[0] > self.RESTART_WINDOW:
+            self.crashes.popleft()
+        self.crashes.append(now)
+        if len(self.crashes) > self.RESTART_LIMIT * self.workers:
+            return None
+        attempt = (len(self.crashes) - 1) // self.workers
+        return min(self.RESTART_BACKOFF * 2 ** attempt, self.RESTART_BACKOFF_MAX)
+
+    def spawn_pending(self) -> None:
+        now = time.monotonic()
+        due = [at for at in self.pending if at <= now]
+        self.pending = [at for at in self.pending if at > now]
+        for _ in due:
+            self.spawn()
+
+    def run(self) -> int:
+        for _ in range(self.workers):
+            self.spawn()
+        log.info(f"Started {self.workers} workers: {sorted(self.children)}")
+
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, self.handle_signal)
+
+        while self.children or self.pending:
+            pid, status = os.waitpid(-1, os.WNOHANG) if self.children else (0, 0)
+            if pid == 0:
+                self.spawn_pending()
+                if self.deadline and time.monotonic() > self.deadline:
+                    log.error("Graceful shutdown deadline exceeded, killing workers")
+                    for child in self.children:
+                        os.kill(child, signal.SIGKILL)
+                    self.deadline = None
+                time.sleep(0.1)
+                continue
+
+            self.children.pop(pid, None)
+            code = os.waitstatus_to_exitcode(status)
+            if self.stopping:
+                continue
+
+            log.error(f"Worker {pid} exited unexpectedly with code {code}")
+            if code == STARTUP_FAILURE:
+                # Respawning would fail the same way - shut everything down
+                self.exit_code = STARTUP_FAILURE
+                self.handle_signal(signal.SIGTERM, None)
+                continue
+
+            delay = self.restart_delay()
+            if delay is None:
+                log.error(
+                    f"Workers crashed {len(self.crashes)} times in {self.RESTART_WINDOW:.0f}s, shutting down"
+                )
+                self.exit_code = 1
+                self.handle_signal(signal.SIGTERM, None)
+            else:
+                log.info(f"Restarting worker in {delay:.1f}s")
+                self.pending.append(time.monotonic() + delay)
+
+        if self.sock is not None:
+            self.sock.close()
+        if self.config.uds and os.path.exists(self.config.uds):
+            os.unlink(self.config.uds)
+
+        log.info("All workers stopped")
+        return self.exit_code
+
+def parse_args(argv=None) -> argparse.Namespace:
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Run the Tetsuo service in production mode")
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument("--uds", default=settings.SERVER_UDS, help="Bind to a Unix socket")
+    parser.add_argument("--workers", type=int, default=settings.SERVER_WORKERS)
+    parser.add_argument(
+        "--reuse-port",
+        action=argparse.BooleanOptionalAction,
+        default=settings.SERVER_REUSE_PORT,
+        help="Bind one SO_REUSEPORT socket per worker"
+    )
+    parser.add_argument(
+        "--preload",
+        action=argparse.BooleanOptionalAction,
+        default=settings.SERVER_PRELOAD,
+        help="Build the app before forking workers"
+    )
+    parser.add_argument("--graceful-timeout", type=float, default=settings.SERVER_GRACEFUL_TIMEOUT)
+    args = parser.parse_args(argv)
+
+    if args.reuse_port and args.uds:
+        parser.error("--reuse-port cannot be combined with --uds")
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    return args
+
+def run(argv=None) -> int:
+    args = parse_args(argv)
+    if args.workers > 1 and get_settings().REDIS_BACKEND == "memory":
+        log.warning("REDIS_BACKEND=memory keeps a separate store per worker - data is not shared")
+    config = build_config(args)
+    sock = None if args.reuse_port else bind_socket(config)
+
+    if args.workers == 1:
+        GracefulServer(config).run(sockets=[sock or bind_reuseport_socket(config)])
+        return 0
+
+    return Supervisor(config, args.workers, sock, args.graceful_timeout).run()
+
+if __name__ == "__main__":
+    sys.exit(run())
@@ -1,8 +1,15 @@
 from .base import BaseService
-from .manager import ServiceManager, service_manager
+from .manager import ServiceManager, get_service_manager
 
 __all__ = [
     "BaseService",
     "ServiceManager",
+    "get_service_manager",
     "service_manager"
-]
\ No newline at end of file
+]
+
+def __getattr__(name: str):
+    # Resolved lazily, see app.services.manager
+    if name == "service_manager":
+        return get_service_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,201 @@
+import asyncio
+import sys
+import time
+import tracemalloc
+from collections.abc import Coroutine
+from contextvars import ContextVar
+from typing import Awaitable, Dict, Optional, TypeVar
+
+from app.core.config import get_settings
+from app.core.logging import log
+
+T = TypeVar("T")
+
+# Name of the service the running code belongs to, inherited by any task it creates
+current_service: ContextVar[Optional[str]] = ContextVar("current_service", default=None)
+
+class ServiceUsage:
+    """Resource counters for one service"""
+    __slots__ = ("cpu_time", "steps", "tasks_created", "tasks_active", "module_file")
+
+    def __init__(self, module_file: Optional[str] = None):
+        self.cpu_time = 0.0
+        self.steps = 0
+        self.tasks_created = 0
+        self.tasks_active = 0
+        self.module_file = module_file
+
+    def get_stats(self) -> dict:
+        return {
+            "cpu_time": round(self.cpu_time, 6),
+            "steps": self.steps,
+            "tasks_created": self.tasks_created,
+            "tasks_active": self.tasks_active,
+        }
+
+class MeteredCoroutine(Coroutine):
+    """
+    Wraps a coroutine and charges the CPU time of each step to a service.
+    A step runs from one resume to the next suspension, so time spent
+    waiting on I/O or sleeping is not counted.
+    """
+    __slots__ = ("_coro", "_usage")
+
+    def __init__(self, coro, usage: ServiceUsage):
+        self._coro = coro
+        self._usage = usage
+
+    def send(self, value):
+        start = time.thread_time()
+        try:
+            return self._coro.send(value)
+        finally:
+            self._usage.cpu_time += time.thread_time() - start
+            self._usage.steps += 1
+
+    def throw(self, *args):
+        start = time.thread_time()
+        try:
+            return self._coro.throw(*args)
+        finally:
+            self._usage.cpu_time += time.thread_time() - start
+            self._usage.steps += 1
+
+    def close(self):
+        return self._coro.close()
+
+    def __await__(self):
+        return self
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return self.send(None)
+
+    def __getattr__(self, name: str):
+        # cr_frame, cr_code etc. for task repr and debugging
+        return getattr(self._coro, name)
+
+class ResourceAccountant:
+    """
+    Attributes tasks, CPU time and (optionally) memory to services.
+
+    Service code is run through `track()`, which sets `current_service`.
+    Tasks created from there inherit the context, and the loop's task
+    factory counts them and meters their steps. Memory is attributed with
+    tracemalloc to allocations with a frame in the service's module.
+    Snapshots are expensive and the status is served from /health, so
+    memory figures are cached for `memory_ttl` seconds.
+    When disabled, `track()` awaits directly and no task factory is installed.
+    """
+
+    def __init__(self, enabled: bool = False, trace_memory: bool = False, trace_frames: int = 10, memory_ttl: float = 30.0):
+        self.enabled = enabled
+        self.trace_memory = enabled and trace_memory
+        self.trace_frames = trace_frames
+        self.memory_ttl = memory_ttl
+        self.usage: Dict[str, ServiceUsage] = {}
+        self._memory: Optional[Dict[str, int]] = None
+        self._memory_at = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._previous_factory = None
+        self._started_tracemalloc = False
+
+    @classmethod
+    def from_settings(cls) -> "ResourceAccountant":
+        settings = get_settings()
+        return cls(
+            enabled=settings.SERVICE_ACCOUNTING,
+            trace_memory=settings.SERVICE_TRACEMALLOC,
+            trace_frames=settings.SERVICE_TRACEMALLOC_FRAMES,
+            memory_ttl=settings.SERVICE_MEMORY_TTL
+        )
+
+    def add_service(self, name: str, service) -> None:
+        module = sys.modules.get(type(service).__module__)
+        self.usage[name] = ServiceUsage(getattr(module, "__file__", None))
+
+    def install(self) -> None:
+        """Install the task factory on the running loop"""
+        if not self.enabled or self._loop is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._previous_factory = self._loop.get_task_factory()
+        self._loop.set_task_factory(self._task_factory)
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start(self.trace_frames)
+            self._started_tracemalloc = True
+        log.info("Service resource accounting enabled")
+
+    def uninstall(self) -> None:
+        if self._loop is None:
+            return
+        self._loop.set_task_factory(self._previous_factory)
+        self._loop = self._previous_factory = None
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def _task_factory(self, loop, coro, **kwargs):
+        context = kwargs.get("context")
+        name = context.get(current_service) if context is not None else current_service.get()
+        usage = self.usage.get(name) if name is not None else None
+        if usage is not None:
+            coro = MeteredCoroutine(coro, usage)
+
+        if self._previous_factory is not None:
+            task = self._previous_factory(loop, coro, **kwargs)
+        else:
+            task = asyncio.Task(coro, loop=loop, **kwargs)
+
+        if usage is not None:
+            usage.tasks_created += 1
+            usage.tasks_active += 1
+            task.add_done_callback(lambda _: self._task_done(usage))
+        return task
+
+    @staticmethod
+    def _task_done(usage: ServiceUsage) -> None:
+        usage.tasks_active -= 1
+
+    async def track(self, name: str, awaitable: Awaitable[T]) -> T:
+        """Await service code, attributing it and any tasks it creates to `name`"""
+        usage = self.usage.get(name)
+        if not self.enabled or usage is None:
+            return await awaitable
+        token = current_service.set(name)
+        try:
+            return await MeteredCoroutine(awaitable.__await__(), usage)
+        finally:
+            current_service.reset(token)
+
+    def memory_by_service(self) -> Dict[str, int]:
+        """Bytes allocated with a frame in each service's module, at most `memory_ttl` seconds old"""
+        if not tracemalloc.is_tracing():
+            return {}
+        now = time.monotonic()
+        if self._memory is None or now - self._memory_at >= self.memory_ttl:
+            self._memory = self._measure_memory()
+            self._memory_at = now
+        return self._memory
+
+    def _measure_memory(self) -> Dict[str, int]:
+        snapshot = tracemalloc.take_snapshot()
+        memory = {}
+        for name, usage in self.usage.items():
+            if usage.module_file is None:
+                continue
+            traces = snapshot.filter_traces([tracemalloc.Filter(True, usage.module_file, all_frames=True)])
+            memory[name] = sum(stat.size for stat in traces.statistics("filename"))
+        return memory
+
+    def get_status(self) -> dict:
+        services = {name: usage.get_stats() for name, usage in self.usage.items()}
+        status = {"enabled": self.enabled, "services": services}
+        if self.trace_memory:
+            for name, size in self.memory_by_service().items():
+                services[name]["memory_bytes"] = size
+            current, peak = tracemalloc.get_traced_memory()
+            status["traced_memory"] = {"current": current, "peak": peak}
+        return status
@@ -1,17 +1,26 @@
 from abc import ABC, abstractmethod
 from typing import Optional, Any
 from app.core import log
-from app.db import redis, RedisSchemas
-from app.schemas import WSEventType, WSEvent, DemoData
+from app.db import RedisSchemas, get_resilient_redis
+from app.schemas import WSEventType, DemoData
+from .connections import get_connection_registry
 
 class BaseService(ABC):
     """
     Base service interface that all core services must implement.
     Provides common functionality and enforces consistent patterns.
+
+    Set `singleton = True` for services that must run in only one worker
+    (pollers, ingesters). The ServiceManager then starts them only in the
+    worker holding the leader lease and sets `fencing_token`, which grows
+    with every change of leader and can be attached to writes. Services
+    depending on a singleton must be singletons too; singletons connected
+    by dependencies share one lease and start together in dependency order.
     """
+    singleton: bool = False
+    fencing_token: Optional[int] = None
     def __init__(self):
         self.redis_schemas = RedisSchemas
-        self._websocket_clients = set()
     
     @abstractmethod
     async def start(self) -> None:
@@ -23,50 +32,37 @@ class BaseService(ABC):
         """Cleanup and stop the service"""
         pass
     
+    @property
+    def service_name(self) -> str:
+        """Name the ServiceManager registers this service under"""
+        return type(self).__name__.lower()
+    
     async def broadcast_event(self, event_type: WSEventType, data: dict) -> None:
-        """Broadcast event to all connected WebSocket clients"""
-        if not self._websocket_clients:
-            return
-            
-        event = WSEvent(event_type=event_type, data=data)
-        dead_clients = set()
-        
-        for client in self._websocket_clients:
-            try:
-                await client.send_json(event.model_dump())
-            except Exception as e:
-                log.error(f"Failed to send to websocket client: {e}")
-                dead_clients.add(client)
-        
-        # Cleanup dead connections
-        self._websocket_clients -= dead_clients
+        """Broadcast event to clients subscribed to this service or to everything"""
+        await get_connection_registry().broadcast(event_type, data, service=self.service_name)
     
     def register_websocket(self, websocket) -> None:
-        """Register a new WebSocket client"""
-        self._websocket_clients.add(websocket)
+        """Subscribe a connected WebSocket client to this service's events"""
+        if not get_connection_registry().subscribe(websocket, service=self.service_name):
+            log.warning(f"Cannot subscribe unregistered WebSocket client to {self.service_name}")
     
     def remove_websocket(self, websocket) -> None:
-        """Remove a WebSocket client"""
-        self._websocket_clients.discard(websocket)
+        """Unsubscribe a WebSocket client from this service's events"""
+        get_connection_registry().unsubscribe(websocket, service=self.service_name)
     
     async def get_redis_data(self, key: str) -> Optional[Any]:
-        """Safely get data from Redis with error handling"""
-        try:
-            async with redis as r:
-                return await r.get(key)
-        except Exception as e:
-            log.error(f"Redis get error: {e}")
-            return None
+        """
+        Safely get data from Redis with error handling.
+        Fails fast while Redis is unhealthy, serving the last known value if any.
+        """
+        return await get_resilient_redis().get(key)
             
     async def set_redis_data(self, key: str, value: Any, ex: Optional[int] = None) -> bool:
-        """Safely set data in Redis with error handling"""
-        try:
-            async with redis as r:
-                await r.set(key, value, ex=ex)
-                return True
-        except Exception as e:
-            log.error(f"Redis set error: {e}")
-            return False
+        """
+        Safely set data in Redis with error handling.
+        Returns False if Redis is unavailable - the write is buffered and replayed on recovery.
+        """
+        return await get_resilient_redis().set(key, value, ex=ex)
     
     @abstractmethod
     async def get_status(self) -> dict:
@@ -0,0 +1,362 @@
+import asyncio
+import time
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Set
+from fastapi import WebSocket
+from loguru import logger
+
+from app.core.config import get_settings
+from app.schemas import WSEvent, WSEventType, dump_json
+
+def _event_key(event_type: Optional[str]) -> Optional[str]:
+    """Index event types by their plain string value"""
+    return getattr(event_type, "value", event_type)
+
+def _frame_size(text: str) -> int:
+    """UTF-8 size of a text frame without encoding the common ASCII case"""
+    return len(text) if text.isascii() else len(text.encode("utf-8"))
+
+def _percentiles(values: List[float]) -> dict:
+    if not values:
+        return {"p50": None, "p95": None, "max": None}
+    values.sort()
+    last = len(values) - 1
+    return {
+        "p50": round(values[last // 2], 3),
+        "p95": round(values[int(last * 0.95)], 3),
+        "max": round(values[last], 3),
+    }
+
+class TrafficTotals:
+    """Frame and byte counters summed over all connections"""
+    __slots__ = ("bytes_sent", "bytes_received", "messages_sent", "messages_received")
+
+    def __init__(self):
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.messages_sent = 0
+        self.messages_received = 0
+
+    def get_stats(self) -> dict:
+        return {
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "messages_sent": self.messages_sent,
+            "messages_received": self.messages_received,
+        }
+
+class WebSocketConnection:
+    """
+    State and statistics for a single registered WebSocket client.
+    Timestamps are `time.monotonic()` values.
+    """
+    __slots__ = (
+        "websocket",
+        "client_ip",
+        "connected_at",
+        "last_seen",
+        "last_message",
+        "last_heartbeat",
+        "bytes_sent",
+        "bytes_received",
+        "messages_sent",
+        "messages_received",
+        "send_lock",
+        "services",
+        "events",
+        "totals",
+    )
+
+    def __init__(self, websocket: WebSocket, client_ip: str, totals: Optional[TrafficTotals] = None):
+        now = time.monotonic()
+        self.websocket = websocket
+        self.client_ip = client_ip
+        self.connected_at = now
+        self.last_seen = now
+        self.last_message = now
+        self.last_heartbeat: Optional[float] = None
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.messages_sent = 0
+        self.messages_received = 0
+        # Serializes concurrent sends (broadcasts, heartbeat and RPC replies)
+        self.send_lock = asyncio.Lock()
+        # Subscriptions, None until the client subscribes to anything
+        self.services: Optional[Set[str]] = None
+        self.events: Optional[Set[str]] = None
+        self.totals = totals or TrafficTotals()
+
+    async def send_text(self, text: str, size: Optional[int] = None) -> None:
+        """Send a text frame and account for it, `size` skips re-measuring broadcast frames"""
+        async with self.send_lock:
+            await self.websocket.send_text(text)
+        size = size if size is not None else _frame_size(text)
+        self.bytes_sent += size
+        self.messages_sent += 1
+        self.totals.bytes_sent += size
+        self.totals.messages_sent += 1
+
+    def record_received(self, text: str, heartbeat: bool = False) -> None:
+        """
+        Account for a frame received from the client.
+        Any frame proves liveness; only non-heartbeat frames reset idleness.
+        """
+        now = time.monotonic()
+        self.last_seen = now
+        if heartbeat:
+            self.last_heartbeat = now
+        else:
+            self.last_message = now
+        size = _frame_size(text)
+        self.bytes_received += size
+        self.messages_received += 1
+        self.totals.bytes_received += size
+        self.totals.messages_received += 1
+
+    def get_stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "client": self.client_ip,
+            "age": round(now - self.connected_at, 3),
+            "idle": round(now - self.last_message, 3),
+            "last_heartbeat": round(now - self.last_heartbeat, 3) if self.last_heartbeat is not None else None,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "messages_sent": self.messages_sent,
+            "messages_received": self.messages_received,
+        }
+
+class ConnectionRegistry:
+    """
+    The process-wide set of WebSocket clients, shared by the ServiceManager
+    and every service.
+
+    Clients are keyed by socket for O(1) add and remove, with secondary
+    indexes of subscribers per service and per event type. A client with no
+    subscriptions receives every broadcast; one that subscribed receives
+    events from its services plus events of its event types. Broadcasts
+    not sent on behalf of a service only honour event type subscriptions.
+    """
+
+    def __init__(self, concurrency: Optional[int] = None, summary_ttl: Optional[float] = None):
+        settings = get_settings()
+        self.concurrency = concurrency or settings.WS_BROADCAST_CONCURRENCY
+        self.summary_ttl = settings.WS_STATS_TTL if summary_ttl is None else summary_ttl
+        self.totals = TrafficTotals()
+        self._summary: Optional[dict] = None
+        self._summary_at = 0.0
+        self.clients: Dict[WebSocket, WebSocketConnection] = {}
+        self.by_ip: Dict[str, int] = {}  # Includes reserved slots
+        self.reserved = 0
+        self.by_service: Dict[str, Set[WebSocket]] = {}
+        self.by_event: Dict[str, Set[WebSocket]] = {}
+        self.unfiltered: Set[WebSocket] = set()
+        self.broadcasts = 0
+        self.failed_sends = 0
+
+    def __len__(self) -> int:
+        return len(self.clients)
+
+    def __contains__(self, websocket: WebSocket) -> bool:
+        return websocket in self.clients
+
+    def get(self, websocket: WebSocket) -> Optional[WebSocketConnection]:
+        return self.clients.get(websocket)
+
+    def count(self) -> int:
+        """Registered clients plus slots reserved for handshakes in progress"""
+        return len(self.clients) + self.reserved
+
+    def count_for_ip(self, client_ip: str) -> int:
+        return self.by_ip.get(client_ip, 0)
+
+    def reserve(self, client_ip: str) -> None:
+        """
+        Hold a slot for a client before its handshake yields, so concurrent
+        handshakes see it in `count()` and `count_for_ip()`. Turn it into a
+        client with `add(..., reserved=True)` or give it back with `release()`.
+        """
+        self.reserved += 1
+        self.by_ip[client_ip] = self.by_ip.get(client_ip, 0) + 1
+
+    def release(self, client_ip: str) -> None:
+        self.reserved -= 1
+        self._decrement_ip(client_ip)
+
+    def add(self, websocket: WebSocket, client_ip: str, reserved: bool = False) -> WebSocketConnection:
+        connection = self.clients.get(websocket)
+        if connection is None:
+            connection = self.clients[websocket] = WebSocketConnection(websocket, client_ip, self.totals)
+            if reserved:
+                self.reserved -= 1
+            else:
+                self.by_ip[client_ip] = self.by_ip.get(client_ip, 0) + 1
+            self.unfiltered.add(websocket)
+        elif reserved:
+            self.release(client_ip)
+        return connection
+
+    def _decrement_ip(self, client_ip: str) -> None:
+        remaining = self.by_ip.get(client_ip, 1) - 1
+        if remaining > 0:
+            self.by_ip[client_ip] = remaining
+        else:
+            self.by_ip.pop(client_ip, None)
+
+    def remove(self, websocket: WebSocket) -> Optional[WebSocketConnection]:
+        """Drop a client and its subscriptions, returns None if it was not registered"""
+        connection = self.clients.pop(websocket, None)
+        if connection is None:
+            return None
+        self._decrement_ip(connection.client_ip)
+        self.unfiltered.discard(websocket)
+        for service in connection.services or ():
+            self._unindex(self.by_service, service, websocket)
+        for event_type in connection.events or ():
+            self._unindex(self.by_event, event_type, websocket)
+        return connection
+
+    def subscribe(self, websocket: WebSocket, service: Optional[str] = None, event_type: Optional[str] = None) -> bool:
+        """Limit a client to broadcasts from `service` and/or of `event_type`"""
+        event_type = _event_key(event_type)
+        connection = self.clients.get(websocket)
+        if connection is None:
+            return False
+        if service is not None:
+            if connection.services is None:
+                connection.services = set()
+            connection.services.add(service)
+            self.by_service.setdefault(service, set()).add(websocket)
+        if event_type is not None:
+            if connection.events is None:
+                connection.events = set()
+            connection.events.add(event_type)
+            self.by_event.setdefault(event_type, set()).add(websocket)
+        if connection.services or connection.events:
+            self.unfiltered.discard(websocket)
+        return True
+
+    def unsubscribe(self, websocket: WebSocket, service: Optional[str] = None, event_type: Optional[str] = None) -> None:
+        event_type = _event_key(event_type)
+        connection = self.clients.get(websocket)
+        if connection is None:
+            return
+        if service is not None and connection.services:
+            connection.services.discard(service)
+            self._unindex(self.by_service, service, websocket)
+        if event_type is not None and connection.events:
+            connection.events.discard(event_type)
+            self._unindex(self.by_event, event_type, websocket)
+        if not connection.services and not connection.events:
+            connection.services = connection.events = None
+            self.unfiltered.add(websocket)
+
+    @staticmethod
+    def _unindex(index: Dict[str, Set[WebSocket]], key: str, websocket: WebSocket) -> None:
+        subscribers = index.get(key)
+        if subscribers is not None:
+            subscribers.discard(websocket)
+            if not subscribers:
+                del index[key]
+
+    def targets(self, service: Optional[str] = None, event_type: Optional[str] = None) -> List[WebSocketConnection]:
+        """Clients that should receive a broadcast from `service` of `event_type`"""
+        if len(self.unfiltered) == len(self.clients):
+            return list(self.clients.values())
+        event_type = _event_key(event_type)
+        if service is None:
+            # System-wide events skip service filters, only event filters apply
+            return [
+                connection for connection in self.clients.values()
+                if connection.events is None or event_type in connection.events
+            ]
+        sockets = set(self.unfiltered)
+        if service is not None:
+            sockets.update(self.by_service.get(service, ()))
+        if event_type is not None:
+            sockets.update(self.by_event.get(event_type, ()))
+        return [self.clients[websocket] for websocket in sockets]
+
+    async def broadcast(self, event_type: WSEventType, data: dict, service: Optional[str] = None) -> int:
+        """
+        Send an event to every matching client.
+        The event is serialized once, clients whose send fails are dropped.
+        Returns the number of clients reached.
+        """
+        connections = self.targets(service, event_type)
+        if not connections:
+            return 0
+
+        text = dump_json(WSEvent(event_type=event_type, data=data)).decode()
+        return await self.send_all(connections, text)
+
+    async def send_all(self, connections: Iterable[WebSocketConnection], text: str) -> int:
+        """
+        Send one frame to many clients, dropping those that fail.
+        Up to `concurrency` workers drain a shared queue of clients, so a
+        slow socket only holds up its own worker, without paying for a
+        task per client on every broadcast.
+        """
+        connections = list(connections)
+        if not connections:
+            return 0
+        size = _frame_size(text)
+        pending = iter(connections)
+        failed: List[WebSocketConnection] = []
+
+        async def worker() -> None:
+            for connection in pending:
+                try:
+                    await connection.send_text(text, size)
+                except Exception as e:
+                    logger.error(f"Failed to send to websocket client: {e}")
+                    failed.append(connection)
+
+        workers = min(self.concurrency, len(connections))
+        if workers == 1:
+            await worker()
+        else:
+            await asyncio.gather(*(worker() for _ in range(workers)))
+        self.broadcasts += 1
+
+        for connection in failed:
+            self.remove(connection.websocket)
+        self.failed_sends += len(failed)
+        return len(connections) - len(failed)
+
+    def get_summary(self) -> Dict[str, Any]:
+        """
+        Connection age and idle-time percentiles. Walking every client is
+        O(N), so the result is cached for `summary_ttl` seconds.
+        """
+        now = time.monotonic()
+        if self._summary is None or now - self._summary_at >= self.summary_ttl:
+            connections = list(self.clients.values())
+            self._summary = {
+                "age": _percentiles([now - c.connected_at for c in connections]),
+                "idle": _percentiles([now - c.last_message for c in connections]),
+            }
+            self._summary_at = now
+        return self._summary
+
+    def get_connection_stats(self) -> List[dict]:
+        """Per-client stats, including client addresses - not for public endpoints"""
+        return [connection.get_stats() for connection in self.clients.values()]
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "clients": len(self.clients),
+            "handshaking": self.reserved,
+            "traffic": self.totals.get_stats(),
+            **self.get_summary(),
+            "unfiltered": len(self.unfiltered),
+            "services": {service: len(sockets) for service, sockets in self.by_service.items()},
+            "events": {event_type: len(sockets) for event_type, sockets in self.by_event.items()},
+            "broadcasts": self.broadcasts,
+            "failed_sends": self.failed_sends,
+        }
+
+@lru_cache()
+def get_connection_registry() -> ConnectionRegistry:
+    """Get the process-wide ConnectionRegistry, creating it on first use"""
+    return ConnectionRegistry()
@@ -0,0 +1,256 @@
+import asyncio
+import os
+import socket
+import time
+import uuid
+from typing import Awaitable, Callable, Optional
+
+from app.core.config import get_settings
+from app.core.logging import log
+
+def make_owner_id() -> str:
+    """Identity of this worker in lease values"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+class RedisLease:
+    """
+    Lease lock in Redis with fencing tokens.
+
+    `leader:<name>` holds the owner id with a PX expiry and
+    `leader:<name>:fence` is incremented on every successful acquire, so
+    each new leader gets a strictly larger token it can attach to writes.
+    """
+    ACQUIRE_SCRIPT = """
+    if redis.call('set', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2]) then
+        return redis.call('incr', KEYS[2])
+    end
+    return 0
+    """
+    RENEW_SCRIPT = """
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        return redis.call('pexpire', KEYS[1], ARGV[2])
+    end
+    return 0
+    """
+    RELEASE_SCRIPT = """
+    if redis.call('get', KEYS[1]) == ARGV[1] then
+        return redis.call('del', KEYS[1])
+    end
+    return 0
+    """
+
+    def __init__(self, client, name: str):
+        self.client = client
+        self.key = f"leader:{name}"
+        self.fence_key = f"leader:{name}:fence"
+        self._acquire = client.register_script(self.ACQUIRE_SCRIPT)
+        self._renew = client.register_script(self.RENEW_SCRIPT)
+        self._release = client.register_script(self.RELEASE_SCRIPT)
+
+    async def acquire(self, owner: str, ttl_ms: int) -> Optional[int]:
+        """Take the lease if free, returns the fencing token"""
+        token = await self._acquire(keys=[self.key, self.fence_key], args=[owner, ttl_ms])
+        return int(token) or None
+
+    async def renew(self, owner: str, ttl_ms: int) -> bool:
+        return bool(await self._renew(keys=[self.key], args=[owner, ttl_ms]))
+
+    async def release(self, owner: str) -> bool:
+        return bool(await self._release(keys=[self.key], args=[owner]))
+
+    async def holder(self) -> Optional[str]:
+        return await self.client.get(self.key)
+
+class MemoryLease:
+    """
+    Same lease semantics on the in-process store (REDIS_BACKEND=memory).
+    Each operation runs without awaiting, so it is atomic in the event loop.
+    """
+
+    def __init__(self, store, name: str):
+        self.store = store
+        self.key = f"leader:{name}"
+        self.fence_key = f"leader:{name}:fence"
+
+    def _holder(self) -> Optional[str]:
+        value = self.store.get(self.key)
+        return value.decode() if value is not None else None
+
+    async def acquire(self, owner: str, ttl_ms: int) -> Optional[int]:
+        if not self.store.set(self.key, owner, px=ttl_ms, nx=True):
+            return None
+        return self.store.incr(self.fence_key)
+
+    async def renew(self, owner: str, ttl_ms: int) -> bool:
+        return self._holder() == owner and self.store.pexpire(self.key, ttl_ms)
+
+    async def release(self, owner: str) -> bool:
+        return self._holder() == owner and bool(self.store.delete(self.key))
+
+    async def holder(self) -> Optional[str]:
+        return self._holder()
+
+def get_lease(name: str):
+    """Lease for the configured Redis backend"""
+    if get_settings().REDIS_BACKEND == "memory":
+        from app.db.memory import get_memory_store
+        return MemoryLease(get_memory_store(), name)
+    from app.db.redis import get_redis
+    return RedisLease(get_redis(), name)
+
+class LeaderElector:
+    """
+    Campaigns for a lease in the background and runs callbacks when this
+    worker gains or loses leadership.
+
+    The leader renews every ttl/3, timing the lease from before each call
+    since Redis may set the expiry at any point while the call is in flight.
+    Renewals must complete while more than ttl/3 of the lease is left,
+    failed ones are retried every retry_interval, and once that window has
+    passed it steps down - before the lease can expire and another worker
+    take over. Followers retry every retry_interval, so a released lease is
+    picked up within that interval and a dead leader's lease within one TTL.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        on_elected: Callable[[int], Awaitable[None]],
+        on_revoked: Callable[[], Awaitable[None]],
+        lease=None,
+        ttl: Optional[float] = None,
+        retry_interval: Optional[float] = None,
+        owner: Optional[str] = None
+    ):
+        settings = get_settings()
+        self.name = name
+        self.on_elected = on_elected
+        self.on_revoked = on_revoked
+        self.lease = lease or get_lease(name)
+        self.ttl = ttl or settings.LEADER_LEASE_TTL
+        self.retry_interval = retry_interval or settings.LEADER_RETRY_INTERVAL
+        self.renew_interval = self.ttl / 3
+        self.owner = owner or make_owner_id()
+
+        self.is_leader = False
+        self.fencing_token: Optional[int] = None
+        self.leader_since: Optional[float] = None
+        self.last_renewed: Optional[float] = None
+        self.renew_failures = 0
+        self.elections_won = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ttl_ms(self) -> int:
+        return int(self.ttl * 1000)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop campaigning, step down and release the lease for fast failover"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.is_leader:
+            await self._step_down("stopping")
+            try:
+                await self.lease.release(self.owner)
+            except Exception as e:
+                log.error(f"Failed to release leadership of {self.name}: {e}")
+
+    async def _run(self) -> None:
+        while True:
+            if self.is_leader:
+                await asyncio.sleep(self._renew_delay())
+                await self._renew()
+            else:
+                await self._campaign()
+                if not self.is_leader:
+                    await asyncio.sleep(self.retry_interval)
+
+    async def _campaign(self) -> None:
+        sent = time.monotonic()
+        try:
+            token = await self.lease.acquire(self.owner, self.ttl_ms)
+        except Exception as e:
+            log.error(f"Leader election for {self.name} failed: {e}")
+            return
+        if token is None:
+            return
+
+        self.is_leader = True
+        self.fencing_token = token
+        self.leader_since = self.last_renewed = sent
+        self.renew_failures = 0
+        self.elections_won += 1
+        log.info(f"Elected leader for {self.name} (fencing token {token})")
+        try:
+            await self.on_elected(token)
+        except Exception as e:
+            log.error(f"Failed to start {self.name} as leader, stepping down: {e}")
+            self.is_leader = False
+            self.fencing_token = None
+            try:
+                await self.lease.release(self.owner)
+            except Exception as e:
+                # The lease expires on its own - keep campaigning either way
+                log.error(f"Failed to release leadership of {self.name}: {e}")
+
+    def _renew_deadline(self) -> float:
+        """When a renewal must have completed by, leaving ttl/3 to stop the service"""
+        return self.last_renewed + self.ttl - self.renew_interval
+
+    def _renew_delay(self) -> float:
+        delay = self.retry_interval if self.renew_failures else self.renew_interval
+        return max(0.0, min(delay, self._renew_deadline() - time.monotonic()))
+
+    async def _renew(self) -> None:
+        sent = time.monotonic()
+        remaining = self._renew_deadline() - sent
+        if remaining <= 0:
+            log.warning(f"Could not renew the leader lease for {self.name} in time")
+            await self._step_down("lease about to expire")
+            return
+        try:
+            renewed = await asyncio.wait_for(self.lease.renew(self.owner, self.ttl_ms), timeout=remaining)
+        except Exception as e:
+            # Keep leading and retry while the lease we hold can't have expired yet
+            self.renew_failures += 1
+            log.error(f"Failed to renew leadership of {self.name}: {e!r}")
+            return
+        if renewed:
+            self.renew_failures = 0
+            self.last_renewed = sent
+        else:
+            log.warning(f"Lost the leader lease for {self.name}")
+            await self._step_down("lease lost")
+
+    async def _step_down(self, reason: str) -> None:
+        log.info(f"Giving up leadership of {self.name}: {reason}")
+        self.is_leader = False
+        self.fencing_token = None
+        self.leader_since = None
+        try:
+            await self.on_revoked()
+        except Exception as e:
+            log.error(f"Error stopping {self.name} after losing leadership: {e}")
+
+    async def get_status(self) -> dict:
+        try:
+            holder = await self.lease.holder()
+        except Exception as e:
+            holder = f"unknown ({e})"
+        return {
+            "is_leader": self.is_leader,
+            "owner": self.owner,
+            "holder": holder,
+            "fencing_token": self.fencing_token,
+            "leader_for": round(time.monotonic() - self.leader_since, 3) if self.leader_since else None,
+            "elections_won": self.elections_won,
+        }
@@ -1,14 +1,20 @@
 from typing import Dict, Type, Optional, List
+from functools import lru_cache
 import asyncio
+import json
+import time
 from loguru import logger
 from fastapi import WebSocket
 from datetime import datetime, timezone
 
+from .accounting import ResourceAccountant
 from .base import BaseService
+from .connections import ConnectionRegistry, WebSocketConnection, get_connection_registry
+from .leader import LeaderElector
 from app.core.config import get_settings
-from app.schemas import WSEventType, WSEvent
+from app.schemas import WSEventType
 
-settings = get_settings()
+PONG_FRAME = '{"type":"pong"}'
 
 class ServiceManager:
     """
@@ -26,7 +32,11 @@ class ServiceManager:
         if not hasattr(self, 'initialized'):
             self.services: Dict[str, BaseService] = {}
             self.service_dependencies: Dict[str, List[str]] = {}
-            self.websocket_clients: set[WebSocket] = set()
+            self.connections: ConnectionRegistry = get_connection_registry()
+            self._idle_sweep_task: Optional[asyncio.Task] = None
+            self.electors: Dict[str, LeaderElector] = {}
+            self.singleton_groups: Dict[str, List[str]] = {}
+            self.accounting = ResourceAccountant.from_settings()
             self.start_time = datetime.now(timezone.utc)
             self.initialized = True
             logger.info("ServiceManager initialized")
@@ -58,6 +68,7 @@ class ServiceManager:
         try:
             service_instance = service_class()
             self.services[service_name] = service_instance
+            self.accounting.add_service(service_name, service_instance)
             logger.info(f"Service {service_name} registered successfully")
         except Exception as e:
             logger.error(f"Failed to register service {service_name}: {e}")
@@ -69,7 +80,10 @@ class ServiceManager:
     
     async def start_services(self) -> None:
         """Start all registered services in dependency order"""
+        self._check_singleton_dependencies()
+        self.singleton_groups = self._build_singleton_groups()
         started_services = set()
+        self.accounting.install()
         
         while len(started_services) < len(self.services):
             started_this_round = False
@@ -78,13 +92,18 @@ class ServiceManager:
                 if service_name in started_services:
                     continue
                     
-                # Check if all dependencies are started
-                dependencies = self.service_dependencies.get(service_name, [])
-                if all(dep in started_services for dep in dependencies):
+                # Check if all dependencies are started - for singletons, those of the whole group
+                group = self.singleton_groups.get(service_name, [service_name])
+                if all(dep in started_services for dep in self._group_dependencies(group)):
                     try:
-                        logger.info(f"Starting service: {service_name}")
-                        await service.start()
-                        started_services.add(service_name)
+                        if service.singleton:
+                            # Started by the elector once this worker is leader
+                            logger.info(f"Campaigning for singleton services: {group}")
+                            await self._start_elector(group)
+                        else:
+                            logger.info(f"Starting service: {service_name}")
+                            await self.accounting.track(service_name, service.start())
+                        started_services.update(group)
                         started_this_round = True
                     except Exception as e:
                         logger.error(f"Failed to start service {service_name}: {e}")
@@ -95,10 +114,13 @@ class ServiceManager:
                 logger.error(f"Circular dependency detected. Could not start: {remaining}")
                 raise RuntimeError("Circular dependency detected in services")
         
+        self._start_idle_sweep()
         logger.info("All services started successfully")
     
     async def stop_services(self) -> None:
         """Stop all services in reverse dependency order"""
+        await self._stop_idle_sweep()
+
         # Build reverse dependency graph
         reverse_deps = {name: [] for name in self.services}
         for service, deps in self.service_dependencies.items():
@@ -114,13 +136,20 @@ class ServiceManager:
                 if service_name in stopped_services:
                     continue
                     
-                # Check if all dependent services are stopped
-                dependents = reverse_deps[service_name]
+                # Check if all dependent services are stopped - singleton groups stop together
+                group = self.singleton_groups.get(service_name, [service_name])
+                dependents = [dep for member in group for dep in reverse_deps[member] if dep not in group]
                 if all(dep in stopped_services for dep in dependents):
                     try:
                         logger.info(f"Stopping service: {service_name}")
-                        await service.stop()
-                        stopped_services.add(service_name)
+                        elector = self.electors.pop(self._lease_name(group), None)
+                        if elector is not None:
+                            # Stops the group if leading and releases the lease
+                            await elector.stop()
+                        else:
+                            for member in reversed(group):
+                                await self.accounting.track(member, self.services[member].stop())
+                        stopped_services.update(group)
                         stopped_this_round = True
                     except Exception as e:
                         logger.error(f"Error stopping service {service_name}: {e}")
@@ -130,65 +159,319 @@ class ServiceManager:
                 logger.error(f"Could not gracefully stop services: {remaining}")
                 break
         
+        self.accounting.uninstall()
         logger.info("All services stopped")
 
-    def _serialize_datetime(self, obj):
-        """Helper to convert datetime objects to ISO format strings"""
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        return obj
-    
-    def _process_data(self, data: dict) -> dict:
-        """Recursively process dict to serialize datetime objects"""
-        return {
-            k: (
-                self._process_data(v) if isinstance(v, dict) else
-                [self._process_data(i) if isinstance(i, dict) else self._serialize_datetime(i) for i in v]
-                if isinstance(v, (list, tuple)) else
-                self._serialize_datetime(v)
-            )
-            for k, v in data.items()
-        }
+    def _check_singleton_dependencies(self) -> None:
+        """
+        A singleton only runs in the leader worker, so a regular service
+        depending on it would run without its dependency in every other
+        worker. Such services must be singletons too, and then share the
+        lease of the singletons they depend on.
+        """
+        for service_name, dependencies in self.service_dependencies.items():
+            service = self.services.get(service_name)
+            if service is None or service.singleton:
+                continue
+            singletons = [dep for dep in dependencies if dep in self.services and self.services[dep].singleton]
+            if singletons:
+                raise RuntimeError(
+                    f"Service {service_name} depends on singleton services {singletons} "
+                    f"and must set singleton = True as well"
+                )
+
+    def _build_singleton_groups(self) -> Dict[str, List[str]]:
+        """
+        Group singletons connected by dependencies, mapping each to its
+        group in start order. A group runs under one lease, so dependent
+        singletons always run together in the same worker.
+        """
+        singletons = [name for name, service in self.services.items() if service.singleton]
+        parent = {name: name for name in singletons}
+
+        def find(name: str) -> str:
+            while parent[name] != name:
+                name = parent[name]
+            return name
+
+        for name in singletons:
+            for dep in self.service_dependencies.get(name, []):
+                if dep in parent:
+                    parent[find(name)] = find(dep)
+
+        members: Dict[str, List[str]] = {}
+        for name in singletons:
+            members.setdefault(find(name), []).append(name)
+
+        groups = {}
+        for group in members.values():
+            ordered = self._start_order(group)
+            for name in group:
+                groups[name] = ordered
+        return groups
+
+    def _start_order(self, names: List[str]) -> List[str]:
+        """Order services so each comes after the ones it depends on"""
+        ordered: List[str] = []
+        remaining = list(names)
+        while remaining:
+            ready = [
+                name for name in remaining
+                if all(dep in ordered or dep not in names for dep in self.service_dependencies.get(name, []))
+            ]
+            if not ready:
+                logger.error(f"Circular dependency detected. Could not start: {set(remaining)}")
+                raise RuntimeError("Circular dependency detected in services")
+            ordered += ready
+            remaining = [name for name in remaining if name not in ready]
+        return ordered
+
+    def _group_dependencies(self, group: List[str]) -> List[str]:
+        """Dependencies of a group of services on services outside it"""
+        return [
+            dep for name in group
+            for dep in self.service_dependencies.get(name, [])
+            if dep not in group
+        ]
+
+    @staticmethod
+    def _lease_name(group: List[str]) -> str:
+        return "+".join(sorted(group))
+
+    async def _start_elector(self, group: List[str]) -> None:
+        """Run a group of singleton services only while this worker holds their lease"""
+        async def on_elected(token: int) -> None:
+            started = []
+            try:
+                for service_name in group:
+                    service = self.services[service_name]
+                    service.fencing_token = token
+                    logger.info(f"Starting singleton service: {service_name}")
+                    await self.accounting.track(service_name, service.start())
+                    started.append(service_name)
+            except BaseException:
+                # Don't leave part of the group running without the lease
+                await stop_members(reversed(started))
+                for service_name in group:
+                    self.services[service_name].fencing_token = None
+                raise
+
+        async def on_revoked() -> None:
+            await stop_members(reversed(group))
+
+        async def stop_members(names) -> None:
+            for service_name in names:
+                service = self.services[service_name]
+                logger.info(f"Stopping singleton service: {service_name}")
+                try:
+                    await self.accounting.track(service_name, service.stop())
+                except Exception as e:
+                    logger.error(f"Error stopping singleton service {service_name}: {e}")
+                finally:
+                    service.fencing_token = None
+
+        name = self._lease_name(group)
+        elector = LeaderElector(name, on_elected, on_revoked)
+        self.electors[name] = elector
+        await elector.start()
+
+    @property
+    def websocket_clients(self) -> Dict[WebSocket, WebSocketConnection]:
+        """Registered clients, see ConnectionRegistry"""
+        return self.connections.clients
 
     async def broadcast_event(self, event_type: WSEventType, data: dict) -> None:
         """Broadcast event to all connected WebSocket clients"""
-        if not self.websocket_clients:
-            return
-            
-        # Process data to handle datetime serialization
-        processed_data = self._process_data(data)
-        event = WSEvent(event_type=event_type, data=processed_data)
-        dead_clients = set()
+        await self.connections.broadcast(event_type, data)
+    
+    async def register_websocket(self, websocket: WebSocket) -> bool:
+        """
+        Accept and register a new WebSocket client.
         
-        for client in self.websocket_clients:
-            try:
-                # Use model_dump_json to ensure proper serialization
-                await client.send_json(event.model_dump(mode='json'))
-            except Exception as e:
-                logger.error(f"Failed to send to websocket client: {e}")
-                dead_clients.add(client)
+        Returns:
+            bool: False if the client was rejected by a connection cap
+        """
+        settings = get_settings()
+        client_ip = websocket.client.host if websocket.client else "unknown"
         
-        # Cleanup dead connections
-        self.websocket_clients -= dead_clients
-    
-    async def register_websocket(self, websocket: WebSocket) -> None:
-        """Register a new WebSocket client"""
-        await websocket.accept()
-        self.websocket_clients.add(websocket)
+        # Counts include reserved slots of handshakes still in progress
+        if settings.WS_MAX_CONNECTIONS and self.connections.count() >= settings.WS_MAX_CONNECTIONS:
+            logger.warning(f"Rejecting WebSocket from {client_ip}: connection limit reached")
+            await websocket.close(code=1013)
+            return False
+        if settings.WS_MAX_CONNECTIONS_PER_IP and self.connections.count_for_ip(client_ip) >= settings.WS_MAX_CONNECTIONS_PER_IP:
+            logger.warning(f"Rejecting WebSocket from {client_ip}: per-IP connection limit reached")
+            await websocket.close(code=1013)
+            return False
+        
+        # Reserve the slot before accept() yields, so concurrent handshakes can't overshoot the caps
+        self.connections.reserve(client_ip)
+        try:
+            await websocket.accept()
+        except BaseException:
+            self.connections.release(client_ip)
+            raise
+        self.connections.add(websocket, client_ip, reserved=True)
         logger.info(f"New WebSocket client connected. Total clients: {len(self.websocket_clients)}")
+        return True
     
     async def remove_websocket(self, websocket: WebSocket) -> None:
         """Remove a WebSocket client"""
-        self.websocket_clients.discard(websocket)
-        logger.info(f"WebSocket client disconnected. Remaining clients: {len(self.websocket_clients)}")
+        if self._discard_websocket(websocket):
+            logger.info(f"WebSocket client disconnected. Remaining clients: {len(self.websocket_clients)}")
     
-    async def get_status(self) -> dict:
-        """Get status of all services"""
+    def _discard_websocket(self, websocket: WebSocket) -> bool:
+        """Drop a client from the registry, returns False if it was not registered"""
+        return self.connections.remove(websocket) is not None
+    
+    async def send_text(self, websocket: WebSocket, text: str) -> None:
+        """Send a text frame to a registered client, tracking its stats"""
+        connection = self.websocket_clients.get(websocket)
+        if connection is None:
+            await websocket.send_text(text)
+            return
+        await connection.send_text(text)
+    
+    def record_message(self, websocket: WebSocket, text: str) -> Optional[str]:
+        """
+        Account for a frame received from a client.
+        
+        Returns:
+            str: "ping" or "pong" if the frame was an application heartbeat, else None
+        """
+        connection = self.websocket_clients.get(websocket)
+        heartbeat = self._heartbeat_type(text) if text.startswith("{") else None
+        if connection is not None:
+            connection.record_received(text, heartbeat=heartbeat is not None)
+        return heartbeat
+    
+    async def handle_heartbeat(self, websocket: WebSocket, text: str) -> bool:
+        """
+        Record a received frame and answer client pings.
+        
+        Liveness is checked with protocol-level pings by the server (see
+        WS_PING_INTERVAL); clients that can't see those, like browsers,
+        may send {"type": "ping"} and get {"type": "pong"} back.
+        
+        Returns:
+            bool: True if the frame was a heartbeat and needs no further handling
+        """
+        heartbeat = self.record_message(websocket, text)
+        if heartbeat == "ping":
+            await self.send_text(websocket, PONG_FRAME)
+        return heartbeat is not None
+    
+    @staticmethod
+    def _heartbeat_type(text: str) -> Optional[str]:
+        if '"ping"' not in text and '"pong"' not in text:
+            return None
+        try:
+            message = json.loads(text)
+        except ValueError:
+            return None
+        if isinstance(message, dict) and message.get("type") in ("ping", "pong"):
+            return message["type"]
+        return None
+    
+    def _start_idle_sweep(self) -> None:
+        if get_settings().WS_IDLE_TIMEOUT > 0 and self._idle_sweep_task is None:
+            self._idle_sweep_task = asyncio.create_task(self._idle_sweep())
+    
+    async def _stop_idle_sweep(self) -> None:
+        if self._idle_sweep_task is None:
+            return
+        self._idle_sweep_task.cancel()
+        try:
+            await self._idle_sweep_task
+        except asyncio.CancelledError:
+            pass
+        self._idle_sweep_task = None
+    
+    async def _idle_sweep(self) -> None:
+        """Periodically evict clients that stopped sending messages"""
+        settings = get_settings()
+        while True:
+            await asyncio.sleep(max(settings.WS_IDLE_TIMEOUT / 2, 1.0))
+            try:
+                self._evict_idle(settings.WS_IDLE_TIMEOUT)
+            except Exception as e:
+                logger.error(f"WebSocket idle sweep error: {e}")
+    
+    def _evict_idle(self, idle_timeout: float) -> int:
+        now = time.monotonic()
+        evict = [
+            websocket for websocket, connection in self.websocket_clients.items()
+            if now - connection.last_message > idle_timeout
+        ]
+        for websocket in evict:
+            self._discard_websocket(websocket)
+            asyncio.create_task(self._close_quietly(websocket, 1001, "idle timeout"))
+        if evict:
+            logger.info(f"Evicted {len(evict)} idle WebSocket clients. Remaining clients: {len(self.websocket_clients)}")
+        return len(evict)
+    
+    @staticmethod
+    async def _close_quietly(websocket: WebSocket, code: int, reason: str, timeout: float = 5.0) -> None:
+        """Close a socket without waiting forever on a half-open peer"""
+        try:
+            await asyncio.wait_for(websocket.close(code=code, reason=reason), timeout=timeout)
+        except Exception:
+            pass
+    
+    async def close_websockets(self, code: int = 1012, reason: str = "", timeout: float = 5.0) -> None:
+        """
+        Send a close frame to every connected WebSocket client.
+        Used on shutdown so clients reconnect to another worker.
+
+        Args:
+            code: WebSocket close code (1012 = service restart)
+            reason: Close reason sent to the client, e.g. a reconnect hint
+            timeout: Maximum seconds to spend closing connections
+        """
+        clients = list(self.websocket_clients)
+        if not clients:
+            return
+
+        async def _close(websocket: WebSocket) -> None:
+            try:
+                await websocket.close(code=code, reason=reason)
+            except Exception as e:
+                logger.debug(f"Failed to close websocket client: {e}")
+
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(_close(client) for client in clients)),
+                timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"Timed out closing WebSocket clients after {timeout}s")
+
+        logger.info(f"Sent close frame to {len(clients)} WebSocket clients")
+
+    async def get_status(self, include_connections: bool = False) -> dict:
+        """
+        Get status of all services.
+        
+        Args:
+            include_connections: Add per-client WebSocket stats. These include
+                client addresses and are O(N), so only for authenticated callers.
+        """
         status = {
             "uptime": (datetime.now(timezone.utc) - self.start_time).total_seconds(),
             "websocket_clients": len(self.websocket_clients),
+            "websocket_registry": self.connections.get_status(),
             "services": {}
         }
+        if include_connections:
+            status["websocket_connections"] = self.connections.get_connection_stats()
+        
+        if self.accounting.enabled:
+            status["resources"] = self.accounting.get_status()
+        
+        if self.electors:
+            status["leadership"] = {
+                name: await elector.get_status() for name, elector in self.electors.items()
+            }
         
         for name, service in self.services.items():
             try:
@@ -200,5 +483,13 @@ class ServiceManager:
         
         return status
 
-# Global instance
-service_manager = ServiceManager()
\ No newline at end of file
+@lru_cache()
+def get_service_manager() -> ServiceManager:
+    """Get the process-wide ServiceManager, creating it on first use"""
+    return ServiceManager()
+
+def __getattr__(name: str):
+    # `service_manager` is created lazily so importing this module has no side effects
+    if name == "service_manager":
+        return get_service_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
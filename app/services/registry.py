@@ -1,5 +1,5 @@
 from typing import List, Tuple, Type
-from app.services import BaseService, service_manager
+from app.services import BaseService, get_service_manager
 from app.core.logging import log
 
 class ServiceRegistry:
@@ -28,7 +28,7 @@ class ServiceRegistry:
                 log.info(f"Registering service: {service_name}")
                 
                 # Register with manager
-                await service_manager.register_service(service_class, dependencies)
+                await get_service_manager().register_service(service_class, dependencies)
                 log.info(f"✓ {service_name} registered successfully")
                 
             except Exception as e:
@@ -14,4 +14,18 @@ def event_loop():
     import asyncio
     loop = asyncio.get_event_loop_policy().new_event_loop()
     yield loop
-    loop.close()
\ No newline at end of file
+    loop.close()
+@pytest.fixture
+def manager(monkeypatch):
+    """A fresh ServiceManager, also returned by get_service_manager(), with an empty connection registry"""
+    from app.services.connections import get_connection_registry
+    from app.services.manager import ServiceManager, get_service_manager
+
+    def reset():
+        get_service_manager.cache_clear()
+        get_connection_registry.cache_clear()
+
+    monkeypatch.setattr(ServiceManager, "_instance", None)
+    reset()
+    yield get_service_manager()
+    reset()
@@ -0,0 +1,93 @@
+import asyncio
+import tracemalloc
+
+import pytest
+
+from app.services.accounting import ResourceAccountant
+from app.services.base import BaseService
+from app.services.manager import ServiceManager
+
+class BusyService(BaseService):
+    """Burns CPU in a background task it creates on start"""
+
+    async def start(self) -> None:
+        self.buffer = [bytearray(1024) for _ in range(512)]
+        self.task = asyncio.create_task(self.work())
+
+    async def work(self) -> None:
+        while True:
+            sum(i * i for i in range(20000))
+            await asyncio.sleep(0)
+
+    async def stop(self) -> None:
+        self.task.cancel()
+
+    async def get_status(self) -> dict:
+        return {"status": "online"}
+
+class IdleService(BaseService):
+    async def start(self) -> None:
+        self.task = asyncio.create_task(asyncio.sleep(3600))
+
+    async def stop(self) -> None:
+        self.task.cancel()
+
+    async def get_status(self) -> dict:
+        return {"status": "online"}
+
+async def run_services(manager: ServiceManager) -> dict:
+    await manager.register_service(BusyService)
+    await manager.register_service(IdleService)
+    await manager.start_services()
+    await asyncio.sleep(0.1)
+    status = await manager.get_status()
+    await manager.stop_services()
+    return status
+
+async def test_tasks_and_cpu_are_attributed_to_services(manager):
+    manager.accounting = ResourceAccountant(enabled=True)
+    loop = asyncio.get_running_loop()
+    factory = loop.get_task_factory()
+
+    resources = (await run_services(manager))["resources"]["services"]
+    busy, idle = resources["busyservice"], resources["idleservice"]
+
+    assert busy["tasks_created"] == idle["tasks_created"] == 1
+    assert busy["tasks_active"] == idle["tasks_active"] == 1
+    assert busy["cpu_time"] > 10 * idle["cpu_time"]
+    assert busy["steps"] > idle["steps"]
+
+    # Cancelled tasks are no longer active and the loop is left as it was
+    await asyncio.sleep(0.01)
+    assert manager.accounting.usage["busyservice"].tasks_active == 0
+    assert loop.get_task_factory() is factory
+
+async def test_disabled_accounting_stays_out_of_the_way(manager):
+    manager.accounting = ResourceAccountant(enabled=False)
+    status = await run_services(manager)
+    assert "resources" not in status
+    assert manager.accounting.usage["busyservice"].tasks_created == 0
+
+async def test_memory_is_attributed_by_service_module(manager):
+    manager.accounting = ResourceAccountant(enabled=True, trace_memory=True)
+    status = await run_services(manager)
+
+    services = status["resources"]["services"]
+    assert services["busyservice"]["memory_bytes"] >= 512 * 1024
+    assert status["resources"]["traced_memory"]["current"] > 0
+
+async def test_memory_snapshots_are_cached(manager, monkeypatch):
+    manager.accounting = ResourceAccountant(enabled=True, trace_memory=True, memory_ttl=60.0)
+    snapshots = []
+    take_snapshot = tracemalloc.take_snapshot
+    monkeypatch.setattr(tracemalloc, "take_snapshot", lambda: snapshots.append(1) or take_snapshot())
+
+    await manager.register_service(BusyService)
+    await manager.start_services()
+    first = await manager.get_status()
+    second = await manager.get_status()
+    await manager.stop_services()
+
+    assert len(snapshots) == 1
+    assert first["resources"]["services"]["busyservice"]["memory_bytes"] == \
+        second["resources"]["services"]["busyservice"]["memory_bytes"]
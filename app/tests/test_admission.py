@@ -0,0 +1,61 @@
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+
+from app.core.admission import AdmissionController, AdmissionControlMiddleware
+
+def build_app(release: asyncio.Event) -> FastAPI:
+    app = FastAPI()
+    app.state.admission = AdmissionController(
+        limits={"/api": 1},
+        default_limit=10,
+        queue_size=1,
+        queue_timeout=0.1,
+        retry_after=3,
+        exempt_paths=["/health"]
+    )
+    app.add_middleware(AdmissionControlMiddleware, controller=app.state.admission)
+
+    @app.get("/api/slow")
+    async def slow():
+        await release.wait()
+        return {"ok": True}
+
+    @app.get("/health")
+    async def health():
+        return {"ok": True}
+
+    return app
+
+async def test_sheds_over_capacity_and_exempts_health():
+    release = asyncio.Event()
+    app = build_app(release)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        admitted = asyncio.create_task(client.get("/api/slow"))
+        await asyncio.sleep(0.01)
+        queued = asyncio.create_task(client.get("/api/slow"))
+        await asyncio.sleep(0.01)
+
+        # Slot taken and queue full - shed immediately
+        shed = await client.get("/api/slow")
+        assert shed.status_code == 503
+        assert shed.headers["Retry-After"] == "3"
+
+        # Health probes bypass admission entirely
+        assert (await client.get("/health")).status_code == 200
+
+        # The queued request gives up after the queue timeout
+        assert (await queued).status_code == 503
+
+        release.set()
+        assert (await admitted).status_code == 200
+
+    status = app.state.admission.get_status()
+    group = status["groups"]["/api"]
+    assert status["shed"] == 2
+    assert group["admitted"] == 1
+    assert group["queue_timeouts"] == 1
+    assert group["active"] == 0 and group["waiting"] == 0
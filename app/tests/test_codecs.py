@@ -0,0 +1,98 @@
+import os
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from app.db.codecs import FORMAT_HEADER, SCHEMA_VERSION, RecordCodec, decode_value, get_codec
+from app.schemas import DemoData
+
+RECORD = {"value": "test", "timestamp": datetime(2024, 5, 1, 12, 30, 15, 250000, tzinfo=timezone.utc)}
+
+@pytest.mark.parametrize("name", ["json", "msgpack"])
+def test_string_codecs_round_trip(name):
+    codec = get_codec(name)
+    raw = codec.encode(RECORD)
+    if codec.binary:
+        assert raw.startswith(FORMAT_HEADER + bytes([codec.format_id, SCHEMA_VERSION]))
+    # decode_value picks the format from the stored bytes, not from settings
+    stored = raw if isinstance(raw, bytes) else raw.encode()
+    assert DemoData(**decode_value(stored)) == DemoData(**RECORD)
+
+def test_hash_codec_round_trip():
+    codec = get_codec("hash")
+    mapping = codec.encode({**RECORD, "missing": None})
+    assert "missing" not in mapping
+    # Redis hands hash values back as strings (or bytes on a binary client)
+    stored = {k.encode(): str(v).encode() for k, v in mapping.items()}
+    assert DemoData(**codec.decode(stored)) == DemoData(**RECORD)
+
+@pytest.fixture
+def local_timezone():
+    """Run in a timezone away from UTC, so naive datetimes differ from local time"""
+    original = os.environ.get("TZ")
+    os.environ["TZ"] = "America/New_York"
+    time.tzset()
+    yield
+    if original is None:
+        del os.environ["TZ"]
+    else:
+        os.environ["TZ"] = original
+    time.tzset()
+
+def read_back(name: str, record: dict) -> DemoData:
+    codec = get_codec(name)
+    raw = codec.encode(record)
+    if codec.uses_hash:
+        return DemoData(**codec.decode({k: str(v) for k, v in raw.items()}))
+    return DemoData(**decode_value(raw if isinstance(raw, bytes) else raw.encode()))
+
+def test_naive_datetimes_are_read_back_as_utc_by_every_codec(local_timezone):
+    record = {"value": "test", "timestamp": datetime(2024, 1, 1, 12)}
+    expected = datetime(2024, 1, 1, 12, tzinfo=timezone.utc)
+    assert {name: read_back(name, record).timestamp for name in ("json", "msgpack", "hash")} == {
+        "json": expected, "msgpack": expected, "hash": expected
+    }
+
+def test_truncated_msgpack_values_are_rejected():
+    raw = get_codec("msgpack").encode(RECORD)
+    for truncated in (raw[:2], raw[:3], raw[:-1]):
+        with pytest.raises(ValueError):
+            decode_value(truncated)
+
+def test_msgpack_is_smaller_than_legacy_json():
+    assert len(get_codec("msgpack").encode(RECORD)) < len(get_codec("json").encode(RECORD))
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError, match="format"):
+        decode_value(FORMAT_HEADER + bytes([99]) + b"payload")
+
+def test_newer_schema_versions_are_rejected():
+    newer = SCHEMA_VERSION + 1
+    raw = bytearray(get_codec("msgpack").encode(RECORD))
+    raw[2] = newer
+    with pytest.raises(ValueError, match="schema version"):
+        decode_value(bytes(raw))
+
+    hash_codec = get_codec("hash")
+    with pytest.raises(ValueError, match="schema version"):
+        hash_codec.decode({**hash_codec.encode(RECORD), "_v": str(newer)})
+    with pytest.raises(ValueError, match="_v"):
+        hash_codec.decode({"value": "test"})
+
+def test_codecs_must_implement_encode_and_decode():
+    class Incomplete(RecordCodec):
+        def encode(self, record):
+            return ""
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+def test_decoding_redis_clients_are_rejected_for_records():
+    from redis.asyncio import Redis
+
+    from app.db.redis import as_binary_client
+    with pytest.raises(TypeError):
+        as_binary_client(Redis(decode_responses=True))
+    client = Redis()
+    assert as_binary_client(client) is client
@@ -0,0 +1,236 @@
+import asyncio
+
+import pytest
+
+from app.core.config import get_settings
+from app.db.memory import MemoryStore
+from app.services.base import BaseService
+from app.services.leader import LeaderElector, MemoryLease
+from app.services.manager import ServiceManager
+
+class Worker:
+    """One simulated worker campaigning for the same service"""
+
+    def __init__(self, store: MemoryStore, name: str):
+        self.running = False
+        self.tokens = []
+        self.elector = LeaderElector(
+            "poller",
+            on_elected=self.on_elected,
+            on_revoked=self.on_revoked,
+            lease=MemoryLease(store, "poller"),
+            ttl=0.3,
+            retry_interval=0.02,
+            owner=name
+        )
+
+    async def on_elected(self, token: int) -> None:
+        self.running = True
+        self.tokens.append(token)
+
+    async def on_revoked(self) -> None:
+        self.running = False
+
+async def test_single_leader_and_failover_on_release():
+    store = MemoryStore()
+    first, second = Worker(store, "first"), Worker(store, "second")
+    await first.elector.start()
+    await asyncio.sleep(0.05)
+    await second.elector.start()
+    await asyncio.sleep(0.15)
+
+    assert first.running and not second.running
+    assert (await second.elector.get_status())["holder"] == "first"
+
+    # Graceful stop releases the lease - the follower takes over on its next retry
+    await first.elector.stop()
+    assert not first.running
+    await asyncio.sleep(0.1)
+
+    assert second.running
+    assert second.tokens[0] > first.tokens[0]
+    await second.elector.stop()
+
+async def test_failover_when_leader_dies():
+    store = MemoryStore()
+    first, second = Worker(store, "first"), Worker(store, "second")
+    await first.elector.start()
+    await asyncio.sleep(0.05)
+    await second.elector.start()
+
+    # Simulate a crash: the leader stops renewing without releasing
+    first.elector._task.cancel()
+    await asyncio.sleep(0.2)
+    assert not second.running
+
+    await asyncio.sleep(0.3)  # lease TTL runs out
+    assert second.running
+    assert second.elector.fencing_token == first.tokens[0] + 1
+    await second.elector.stop()
+
+async def test_leader_steps_down_when_lease_is_taken():
+    store = MemoryStore()
+    worker = Worker(store, "first")
+    await worker.elector.start()
+    await asyncio.sleep(0.05)
+    assert worker.running
+
+    # Lease expired and was grabbed elsewhere (e.g. after a long GC pause)
+    store.set("leader:poller", "intruder")
+    await asyncio.sleep(0.15)
+    assert not worker.running
+    await worker.elector.stop()
+
+class FlakyLease(MemoryLease):
+    """Lease whose release fails, like Redis going down mid-election"""
+
+    async def release(self, owner: str) -> bool:
+        raise ConnectionError("redis down")
+
+async def test_keeps_campaigning_when_start_and_release_fail():
+    store = MemoryStore()
+    attempts = []
+
+    async def on_elected(token: int) -> None:
+        attempts.append(token)
+        raise ConnectionError("redis down")
+
+    async def on_revoked() -> None:
+        pass
+
+    elector = LeaderElector(
+        "poller", on_elected, on_revoked,
+        lease=FlakyLease(store, "poller"), ttl=0.05, retry_interval=0.01, owner="first"
+    )
+    await elector.start()
+    await asyncio.sleep(0.2)
+    # The unreleased lease expires and the elector tries again
+    assert len(attempts) >= 2
+    assert not elector._task.done()
+    await elector.stop()
+
+class HangingLease(MemoryLease):
+    """Lease whose renewals never return, like a Redis that stopped answering"""
+
+    async def renew(self, owner: str, ttl_ms: int) -> bool:
+        await asyncio.Event().wait()
+
+async def test_steps_down_before_the_lease_expires_when_renewals_hang():
+    store = MemoryStore()
+    lease_held_at_step_down = []
+
+    async def on_elected(token: int) -> None:
+        pass
+
+    async def on_revoked() -> None:
+        lease_held_at_step_down.append(store.get("leader:poller") is not None)
+
+    elector = LeaderElector(
+        "poller", on_elected, on_revoked,
+        lease=HangingLease(store, "poller"), ttl=0.3, retry_interval=0.02, owner="first"
+    )
+    await elector.start()
+    await asyncio.sleep(0.05)
+    assert elector.is_leader
+
+    await asyncio.sleep(0.2)
+    # Stepped down while the lease could not yet be taken by another worker
+    assert not elector.is_leader
+    assert lease_held_at_step_down == [True]
+    await elector.stop()
+
+async def test_regular_services_cannot_depend_on_singletons(manager):
+    class Poller(BaseService):
+        singleton = True
+
+        async def start(self) -> None:
+            pass
+
+        async def stop(self) -> None:
+            pass
+
+        async def get_status(self) -> dict:
+            return {}
+
+    class Consumer(Poller):
+        singleton = False
+
+    await manager.register_service(Poller)
+    await manager.register_service(Consumer, ["poller"])
+    with pytest.raises(RuntimeError, match="singleton"):
+        await manager.start_services()
+
+class Source(BaseService):
+    """Singleton the Consumer singleton depends on"""
+    singleton = True
+    events = []
+
+    def __init__(self):
+        super().__init__()
+        self.worker = None
+
+    async def start(self) -> None:
+        self.events.append((self.worker, type(self).__name__.lower(), "start"))
+
+    async def stop(self) -> None:
+        self.events.append((self.worker, type(self).__name__.lower(), "stop"))
+
+    async def get_status(self) -> dict:
+        return {}
+
+class Consumer(Source):
+    pass
+
+async def start_worker(name: str) -> ServiceManager:
+    ServiceManager._instance = None
+    worker = ServiceManager()
+    await worker.register_service(Consumer, ["source"])
+    await worker.register_service(Source)
+    for service in worker.services.values():
+        service.worker = name
+    await worker.start_services()
+    return worker
+
+async def test_dependent_singletons_run_together_under_one_lease(manager, monkeypatch):
+    store = MemoryStore()
+    monkeypatch.setattr("app.services.leader.get_lease", lambda name: MemoryLease(store, name))
+    monkeypatch.setattr(get_settings(), "LEADER_LEASE_TTL", 0.3)
+    monkeypatch.setattr(get_settings(), "LEADER_RETRY_INTERVAL", 0.02)
+    monkeypatch.setattr(Source, "events", [])
+
+    # Another worker already holds the lease a lone Source would campaign for
+    store.set("leader:source", "elsewhere")
+    first = await start_worker("first")
+    second = await start_worker("second")
+    await asyncio.sleep(0.1)
+
+    # Both run in the same worker, the dependency first
+    assert list(first.electors) == ["consumer+source"]
+    assert Source.events == [("first", "source", "start"), ("first", "consumer", "start")]
+
+    # Failover moves the whole group, stopped in reverse order
+    await first.stop_services()
+    await asyncio.sleep(0.1)
+    assert Source.events[2:] == [
+        ("first", "consumer", "stop"), ("first", "source", "stop"),
+        ("second", "source", "start"), ("second", "consumer", "start"),
+    ]
+    await second.stop_services()
+
+async def test_singleton_group_is_stopped_if_a_member_fails_to_start(manager, monkeypatch):
+    store = MemoryStore()
+    monkeypatch.setattr("app.services.leader.get_lease", lambda name: MemoryLease(store, name))
+    monkeypatch.setattr(Source, "events", [])
+
+    async def fail() -> None:
+        raise ConnectionError("redis down")
+
+    await manager.register_service(Source)
+    await manager.register_service(Consumer, ["source"])
+    monkeypatch.setattr(manager.services["consumer"], "start", fail)
+    await manager.start_services()
+    await asyncio.sleep(0.05)
+
+    assert Source.events[:2] == [(None, "source", "start"), (None, "source", "stop")]
+    assert all(service.fencing_token is None for service in manager.services.values())
+    await manager.stop_services()
@@ -0,0 +1,100 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from redis.exceptions import ResponseError
+
+from app.db.codecs import get_codec
+from app.db.memory import InMemoryRedis, MemoryStore
+from app.db.schemas import RedisKeys, RedisSchemas
+from app.schemas import DemoData
+
+@pytest.fixture
+def store():
+    return MemoryStore()
+
+@pytest.fixture
+def r(store):
+    return InMemoryRedis(store, decode_responses=True)
+
+async def test_strings_and_expiry(r):
+    assert await r.set("a", "1", ex=60)
+    assert await r.get("a") == "1"
+    assert 0 < await r.ttl("a") <= 60
+    assert await r.set("a", "2", nx=True) is None
+    assert await r.mget(["a", "missing"]) == ["1", None]
+
+    await r.set("short", "x", px=10)
+    await asyncio.sleep(0.02)
+    assert await r.get("short") is None
+    assert await r.ttl("short") == -2
+    assert await r.incr("counter") == 1
+
+async def test_pipeline_hashes_and_wrongtype(r):
+    pipe = r.pipeline()
+    pipe.hset("h", mapping={"x": 1, "y": "two"}).expire("h", 30)
+    pipe.set("s", "v")
+    assert await pipe.execute() == [2, True, True]
+    assert await r.hgetall("h") == {"x": "1", "y": "two"}
+
+    with pytest.raises(ResponseError, match="WRONGTYPE"):
+        await r.get("h")
+
+async def test_sorted_sets(r):
+    await r.zadd("z", {"a": 3, "b": 1, "c": 2})
+    assert await r.zrange("z", 0, -1) == ["b", "c", "a"]
+    assert await r.zrange("z", 0, 0, desc=True, withscores=True) == [("a", 3.0)]
+    assert await r.zrangebyscore("z", "(1", "+inf") == ["c", "a"]
+    assert await r.zremrangebyscore("z", 0, 2) == 2
+    assert await r.zcard("z") == 1
+
+async def test_pubsub(r):
+    pubsub = r.pubsub(ignore_subscribe_messages=True)
+    await pubsub.subscribe("events")
+    assert await r.publish("events", "hello") == 1
+    message = await pubsub.get_message(timeout=1)
+    assert message["channel"] == "events" and message["data"] == "hello"
+    assert await pubsub.get_message(timeout=0) is None
+    await pubsub.aclose()
+    assert await r.publish("events", "nobody") == 0
+
+async def test_redis_schemas_read_any_codec(store):
+    text, binary = InMemoryRedis(store, decode_responses=True), InMemoryRedis(store)
+    data = DemoData(value="demo", timestamp=datetime(2024, 1, 1, tzinfo=timezone.utc))
+    key = RedisKeys.demo_key("demo")
+
+    for name in ("json", "msgpack", "hash"):
+        codec = get_codec(name)
+        await RedisSchemas.store_record(binary, key, {"value": data.value, "timestamp": data.timestamp}, codec=codec)
+        # Readers configured for another format still decode the record
+        for reader in ("json", "hash"):
+            record = await RedisSchemas.load_record(binary, key, codec=get_codec(reader))
+            assert DemoData(**record) == data
+
+    await RedisSchemas.store_demo(text, data)
+    assert await RedisSchemas.get_demo(text, "demo") == data
+
+async def test_redis_schemas_read_binary_records_through_a_text_client(store, r):
+    data = DemoData(value="demo", timestamp=datetime(2024, 1, 1, tzinfo=timezone.utc))
+    key = RedisKeys.demo_key("demo")
+    await RedisSchemas.store_record(r, key, {"value": data.value, "timestamp": data.timestamp}, codec=get_codec("msgpack"))
+    assert await RedisSchemas.get_demo(r, "demo") == data
+
+async def test_expired_keys_are_removed_without_being_read(store):
+    for i in range(50):
+        store.set(f"short:{i}", "x", px=5)
+    await asyncio.sleep(0.01)
+
+    # Writes with an expiry sweep keys whose deadline passed
+    for i in range(3):
+        store.set(f"fresh:{i}", "y", ex=60)
+    assert len(store._data) == 3
+    assert store.sweep_expired(limit=100) == 0
+
+async def test_pipeline_runs_every_command_before_raising(r):
+    await r.hset("h", mapping={"x": 1})
+    pipe = r.pipeline()
+    pipe.set("before", "1").get("h").set("after", "2")
+    with pytest.raises(ResponseError, match="WRONGTYPE"):
+        await pipe.execute()
+    assert await r.get("after") == "2"
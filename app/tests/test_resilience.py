@@ -0,0 +1,156 @@
+import asyncio
+
+from app.db.resilience import CircuitBreaker, LocalCache, ResilientRedis, WriteBuffer
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def set(self, key, value, ex=None):
+        self.commands.append((key, value, ex))
+        return self
+
+    async def execute(self):
+        self.redis.check()
+        for key, value, ex in self.commands:
+            self.redis.data[key] = value
+        self.redis.pipelines += 1
+
+class FakeRedis:
+    """Stands in for both the RedisManager and the client"""
+
+    def __init__(self):
+        self.data = {}
+        self.down = False
+        self.calls = 0
+        self.pipelines = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    def check(self):
+        self.calls += 1
+        if self.down:
+            raise ConnectionError("redis down")
+
+    async def get(self, key):
+        self.check()
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.check()
+        self.data[key] = value
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+def build(fake: FakeRedis) -> ResilientRedis:
+    return ResilientRedis(
+        breaker=CircuitBreaker(failure_threshold=2, recovery_timeout=0.05),
+        cache=LocalCache(max_size=10, max_age=60),
+        write_buffer=WriteBuffer(max_size=2),
+        manager=fake
+    )
+
+async def test_fails_fast_and_serves_stale_reads():
+    fake = FakeRedis()
+    client = build(fake)
+    assert await client.set("a", "1")
+    assert await client.get("a") == "1"
+
+    fake.down = True
+    assert await client.get("a") == "1"
+    assert await client.get("a") == "1"
+    assert client.breaker.state == CircuitBreaker.OPEN
+
+    # Open circuit - served locally without touching Redis
+    calls = fake.calls
+    assert await client.get("a") == "1"
+    assert await client.get("missing") is None
+    assert fake.calls == calls
+    assert client.get_status()["stale_reads"] == 3
+
+async def test_buffers_failed_writes_and_replays_on_recovery():
+    fake = FakeRedis()
+    client = build(fake)
+    fake.down = True
+
+    assert not await client.set("a", "1")
+    assert not await client.set("b", "2")
+    assert not await client.set("a", "3")  # coalesced with the first write
+    assert not await client.set("c", "4")  # buffer full - oldest write dropped
+    assert client.get_status()["dropped_writes"] == 1
+    # Reads see buffered values
+    assert await client.get("c") == "4"
+
+    fake.down = False
+    await asyncio.sleep(0.06)
+    assert await client.get("other") is None  # half-open trial succeeds
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+    await client._replay_task
+    assert fake.data == {"a": "3", "c": "4"}
+    assert fake.pipelines == 1
+    assert client.get_status()["replayed_writes"] == 2
+
+async def test_cancelled_trial_call_frees_the_half_open_slot():
+    fake = FakeRedis()
+    client = build(fake)
+    fake.down = True
+    await client.get("a")
+    await client.get("a")
+    assert client.breaker.state == CircuitBreaker.OPEN
+
+    fake.down = False
+    await asyncio.sleep(0.06)
+    hang = asyncio.Event()
+
+    async def hanging_get(key):
+        await hang.wait()
+
+    client._get = hanging_get
+    trial = asyncio.create_task(client.get("a"))
+    await asyncio.sleep(0.01)
+    trial.cancel()
+    await asyncio.gather(trial, return_exceptions=True)
+
+    # The next call is allowed through as a trial and closes the circuit
+    del client._get
+    assert await client.get("a") is None
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+async def test_replay_never_overwrites_a_newer_write():
+    fake = FakeRedis()
+    client = build(fake)
+    fake.down = True
+    assert not await client.set("k", "old")
+    fake.down = False
+
+    release = asyncio.Event()
+    execute = FakePipeline.execute
+
+    async def slow_execute(pipeline):
+        await release.wait()
+        await execute(pipeline)
+
+    FakePipeline.execute = slow_execute
+    try:
+        replay = asyncio.create_task(client.replay())
+        await asyncio.sleep(0.01)
+        # The buffered value is in flight - reads still see the newest value
+        write = asyncio.create_task(client.set("k", "new"))
+        await asyncio.sleep(0.01)
+        assert await client.get("k") == "new"
+
+        release.set()
+        assert await write
+        await replay
+    finally:
+        FakePipeline.execute = execute
+
+    assert fake.data == {"k": "new"}
+    assert await client.get("k") == "new"
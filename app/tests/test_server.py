@@ -0,0 +1,44 @@
+import os
+import signal
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.server import Supervisor
+
+class CrashingSupervisor(Supervisor):
+    """Workers exit with an error as soon as they are forked"""
+    RESTART_BACKOFF = 0.05
+    RESTART_LIMIT = 3
+
+    def __init__(self, workers: int):
+        super().__init__(config=SimpleNamespace(uds=None), workers=workers, sock=None, graceful_timeout=1.0)
+        self.spawned = []
+
+    def spawn(self) -> None:
+        pid = os.fork()
+        if pid == 0:
+            os._exit(1)
+        self.children[pid] = time.monotonic()
+        self.spawned.append(time.monotonic())
+
+@pytest.fixture
+def restore_signals():
+    handlers = {sig: signal.getsignal(sig) for sig in (signal.SIGINT, signal.SIGTERM)}
+    yield
+    for sig, handler in handlers.items():
+        signal.signal(sig, handler)
+
+def test_restarts_back_off_per_worker_and_give_up():
+    supervisor = Supervisor(config=SimpleNamespace(uds=None), workers=2, sock=None, graceful_timeout=1.0)
+    delays = [supervisor.restart_delay() for _ in range(2 * Supervisor.RESTART_LIMIT + 1)]
+    assert delays == [0.5, 0.5, 1.0, 1.0, 2.0, 2.0, 4.0, 4.0, 8.0, 8.0, None]
+
+def test_crashing_workers_shut_the_supervisor_down(restore_signals):
+    supervisor = CrashingSupervisor(workers=2)
+    assert supervisor.run() == 1
+
+    # Gave up on the 7th crash, dropping any restart still pending
+    assert len(supervisor.crashes) == 2 * 3 + 1
+    assert 2 * 3 + 1 <= len(supervisor.spawned) <= 2 + 2 * 3
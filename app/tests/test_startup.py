@@ -0,0 +1,86 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+
+# Budgets in milliseconds - override via env on slow CI machines
+IMPORT_BUDGET_MS = float(os.getenv("IMPORT_BUDGET_MS", "1500"))
+APP_IMPORT_SELF_BUDGET_MS = float(os.getenv("APP_IMPORT_SELF_BUDGET_MS", "150"))
+COLD_START_BUDGET_MS = float(os.getenv("COLD_START_BUDGET_MS", "3000"))
+
+def run_python(args, cwd):
+    """Run a fresh interpreter with the project on the path"""
+    env = dict(os.environ, PYTHONPATH=str(project_root))
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=60
+    )
+
+def parse_importtime(stderr: str) -> dict:
+    """Parse `-X importtime` output into {module: (self_us, cumulative_us)}"""
+    timings = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        self_us, cumulative_us, module = int(parts[0]), int(parts[1]), parts[2].strip()
+        timings[module] = (self_us, cumulative_us)
+    return timings
+
+def test_import_has_no_side_effects(tmp_path):
+    """Importing the app must not configure sinks, touch Redis or build services"""
+    code = (
+        "import app.main\n"
+        "from loguru import logger\n"
+        "print(len(logger._core.handlers))\n"
+        "import app.services.manager as m\n"
+        "print(m.get_service_manager.cache_info().currsize)\n"
+    )
+    result = run_python(["-c", code], cwd=tmp_path)
+    assert result.returncode == 0, result.stderr
+    handlers, managers = result.stdout.split()
+
+    assert not (tmp_path / "logs").exists()
+    assert handlers == "1"  # loguru default stderr sink only
+    assert managers == "0"
+
+def test_import_time_budget(tmp_path):
+    result = run_python(["-X", "importtime", "-c", "import app.main"], cwd=tmp_path)
+    assert result.returncode == 0, result.stderr
+    timings = parse_importtime(result.stderr)
+
+    total_ms = timings["app.main"][1] / 1000
+    own_ms = sum(
+        self_us for module, (self_us, _) in timings.items()
+        if module == "app" or module.startswith("app.")
+    ) / 1000
+
+    assert total_ms < IMPORT_BUDGET_MS, f"import app.main took {total_ms:.0f}ms"
+    assert own_ms < APP_IMPORT_SELF_BUDGET_MS, f"app modules took {own_ms:.0f}ms"
+
+def test_cold_start_to_first_request(tmp_path):
+    """Time from interpreter start to the first served request (no lifespan)"""
+    code = (
+        "import time\n"
+        "start = time.perf_counter()\n"
+        "import asyncio, httpx\n"
+        "from app.main import create_app\n"
+        "async def main():\n"
+        "    transport = httpx.ASGITransport(app=create_app())\n"
+        "    async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:\n"
+        "        response = await client.get('/')\n"
+        "        assert response.status_code == 200, response.text\n"
+        "asyncio.run(main())\n"
+        "print((time.perf_counter() - start) * 1000)\n"
+    )
+    result = run_python(["-c", code], cwd=tmp_path)
+    assert result.returncode == 0, result.stderr
+
+    elapsed_ms = float(result.stdout.split()[-1])
+    assert elapsed_ms < COLD_START_BUDGET_MS, f"cold start took {elapsed_ms:.0f}ms"
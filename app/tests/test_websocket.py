@@ -0,0 +1,155 @@
+import asyncio
+import json
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import get_settings
+from app.schemas import WSEventType
+from app.services.base import BaseService
+
+class FakeWebSocket:
+    def __init__(self, host: str = "10.0.0.1"):
+        self.client = SimpleNamespace(host=host, port=1234)
+        self.accepted = False
+        self.closed = None
+        self.sent = []
+
+    async def accept(self):
+        self.accepted = True
+
+    async def close(self, code: int = 1000, reason: str = ""):
+        self.closed = code
+
+    async def send_text(self, text: str):
+        if self.closed is not None:
+            raise RuntimeError("socket closed")
+        self.sent.append(text)
+
+@pytest.fixture
+def settings(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "WS_MAX_CONNECTIONS", 3)
+    monkeypatch.setattr(settings, "WS_MAX_CONNECTIONS_PER_IP", 2)
+    monkeypatch.setattr(settings, "WS_PONG_TIMEOUT", 5.0)
+    monkeypatch.setattr(settings, "WS_IDLE_TIMEOUT", 0.0)
+    return settings
+
+async def test_connection_caps(manager, settings):
+    first, second, third = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+    assert await manager.register_websocket(first)
+    assert await manager.register_websocket(second)
+
+    # Per-IP cap rejects before accepting
+    assert not await manager.register_websocket(third)
+    assert not third.accepted and third.closed == 1013
+
+    assert await manager.register_websocket(FakeWebSocket("10.0.0.2"))
+    # Global cap
+    assert not await manager.register_websocket(FakeWebSocket("10.0.0.3"))
+
+    # Freed slots can be reused
+    await manager.remove_websocket(first)
+    assert await manager.register_websocket(third)
+
+class SlowHandshake(FakeWebSocket):
+    def __init__(self, host: str = "10.0.0.1", fail: bool = False):
+        super().__init__(host)
+        self.fail = fail
+
+    async def accept(self):
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise ConnectionResetError("peer went away")
+        self.accepted = True
+
+async def test_concurrent_handshakes_respect_caps(manager, settings):
+    sockets = [SlowHandshake(f"10.0.0.{i % 2}") for i in range(10)]
+    results = await asyncio.gather(*(manager.register_websocket(websocket) for websocket in sockets))
+
+    assert sum(results) == 3
+    assert len(manager.websocket_clients) == 3
+    assert manager.connections.count() == 3
+    assert all(websocket.closed == 1013 for websocket, ok in zip(sockets, results) if not ok)
+
+    # A failed handshake gives its slot back
+    await manager.remove_websocket(sockets[results.index(True)])
+    with pytest.raises(ConnectionResetError):
+        await manager.register_websocket(SlowHandshake("10.0.0.5", fail=True))
+    assert manager.connections.count() == 2
+    assert manager.connections.count_for_ip("10.0.0.5") == 0
+    assert await manager.register_websocket(SlowHandshake("10.0.0.5"))
+
+async def test_listen_only_clients_are_never_pinged_or_evicted(manager, settings):
+    listener, chatty = FakeWebSocket(), FakeWebSocket("10.0.0.2")
+    await manager.register_websocket(listener)
+    await manager.register_websocket(chatty)
+
+    # Application heartbeats are client-initiated
+    assert await manager.handle_heartbeat(chatty, json.dumps({"type": "ping"}))
+    assert chatty.sent == ['{"type":"pong"}'] and listener.sent == []
+    assert not await manager.handle_heartbeat(chatty, "hello")
+
+    # Idle eviction only happens when WS_IDLE_TIMEOUT is set
+    manager.websocket_clients[listener].last_message = time.monotonic() - 120
+    assert manager._evict_idle(60) == 1
+    assert listener not in manager.websocket_clients
+    assert chatty in manager.websocket_clients
+
+async def test_status_hides_per_client_details_by_default(manager, settings):
+    websocket = FakeWebSocket()
+    await manager.register_websocket(websocket)
+    await manager.handle_heartbeat(websocket, json.dumps({"type": "ping"}))
+    await manager.handle_heartbeat(websocket, "hello")
+
+    status = await manager.get_status()
+    assert "websocket_connections" not in status
+    assert "10.0.0.1" not in json.dumps(status)
+    registry = status["websocket_registry"]
+    assert registry["clients"] == 1
+    assert registry["traffic"]["messages_received"] == 2
+    assert registry["traffic"]["messages_sent"] == 1
+    assert registry["age"]["p50"] is not None
+
+    stats = (await manager.get_status(include_connections=True))["websocket_connections"][0]
+    assert stats["client"] == "10.0.0.1"
+    assert stats["last_heartbeat"] is not None
+
+class PriceService(BaseService):
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def get_status(self) -> dict:
+        return {"status": "online"}
+
+async def test_services_and_manager_share_one_broadcast_path(manager, settings):
+    everything, subscriber, other = FakeWebSocket(), FakeWebSocket("10.0.0.2"), FakeWebSocket("10.0.0.3")
+    for websocket in (everything, subscriber, other):
+        await manager.register_websocket(websocket)
+    service = PriceService()
+    service.register_websocket(subscriber)
+    manager.connections.subscribe(other, service="otherservice")
+
+    # Datetimes in service events are serialized in JSON mode
+    when = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    await service.broadcast_event(WSEventType.NEW_EVENT, {"at": when})
+    assert json.loads(subscriber.sent[-1])["data"] == {"at": "2024-01-01T00:00:00Z"}
+    assert everything.sent == subscriber.sent and other.sent == []
+
+    # Manager broadcasts reach every client, and failed clients are dropped
+    other.closed = 1006
+    await manager.broadcast_event(WSEventType.NEW_EVENT, {"n": 1})
+    assert json.loads(everything.sent[-1])["data"] == {"n": 1}
+    assert other not in manager.websocket_clients
+    assert manager.connections.by_service == {"priceservice": {subscriber}}
+
+    # Without subscriptions a client goes back to receiving everything
+    service.remove_websocket(subscriber)
+    await manager.remove_websocket(everything)
+    assert manager.connections.by_service == {}
+    assert await manager.connections.broadcast(WSEventType.NEW_EVENT, {}, service="priceservice") == 1
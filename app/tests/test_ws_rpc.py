@@ -0,0 +1,84 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+from fastapi import APIRouter, Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.rpc import RPCSession, parse_message
+from app.core.auth import verify_token
+from app.core.config import get_settings
+from app.main import create_app
+
+# create_app() endpoints use get_service_manager(), reset by this fixture
+pytestmark = pytest.mark.usefixtures("manager")
+
+def test_rpc_over_websocket():
+    token = get_settings().API_TOKEN
+    client = TestClient(create_app())
+
+    with client.websocket_connect("/ws") as ws:
+        request = {"type": "request", "id": 1, "method": "POST", "path": "/api/v1/demo/demo", "body": {"demo": "hi"}}
+        ws.send_text(json.dumps(request))
+        assert json.loads(ws.receive_text()) == {"type": "response", "id": 1, "status": 401, "error": "Not authenticated"}
+
+        # Authenticate once, then call freely
+        ws.send_text(json.dumps({"type": "auth", "token": token}))
+        assert json.loads(ws.receive_text()) == {"type": "auth", "ok": True}
+        ws.send_text(json.dumps(request))
+        assert json.loads(ws.receive_text()) == {"type": "response", "id": 1, "status": 200, "body": {"demo": "hi"}}
+
+        ws.send_text(json.dumps({**request, "id": "bad", "body": {}}))
+        assert json.loads(ws.receive_text())["status"] == 422
+        ws.send_text(json.dumps({**request, "id": 2, "path": "/health"}))
+        assert json.loads(ws.receive_text())["status"] == 404
+
+        # Anything else is still echoed
+        ws.send_text("hello")
+        assert ws.receive_text() == "Message received: hello"
+
+    # A bearer header on the handshake authenticates the connection up front
+    with client.websocket_connect("/ws", headers={"Authorization": f"Bearer {token}"}) as ws:
+        ws.send_text(json.dumps(request))
+        assert json.loads(ws.receive_text())["status"] == 200
+
+def build_api(release: asyncio.Event) -> FastAPI:
+    router = APIRouter(dependencies=[Depends(verify_token)])
+
+    @router.get("/slow")
+    async def slow(n: int):
+        await release.wait()
+        return {"n": n}
+
+    app = FastAPI()
+    app.include_router(router, prefix="/api/v1")
+    return app
+
+async def test_requests_run_concurrently_up_to_the_cap():
+    release = asyncio.Event()
+    sent = []
+
+    async def send_text(text: str) -> None:
+        sent.append(json.loads(text))
+
+    websocket = SimpleNamespace(
+        headers={},
+        scope={"app": build_api(release), "scheme": "ws", "client": ("10.0.0.1", 1234), "server": ("test", 80)}
+    )
+    session = RPCSession(websocket, send_text, max_in_flight=2)
+    session.authenticated = True
+
+    for i in range(3):
+        await session.handle(parse_message(json.dumps(
+            {"type": "request", "id": i, "method": "GET", "path": "/api/v1/slow", "params": {"n": i}}
+        )))
+    await asyncio.sleep(0.05)
+    assert sent == [{"type": "response", "id": 2, "status": 429, "error": "Too many requests in flight"}]
+
+    release.set()
+    await asyncio.sleep(0.05)
+    assert sorted(r["id"] for r in sent[1:]) == [0, 1]
+    assert all(r["status"] == 200 and r["body"] == {"n": r["id"]} for r in sent[1:])
+    assert not session.tasks
+    await session.close()
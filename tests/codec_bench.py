@@ -0,0 +1,48 @@
+import sys
+import timeit
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from app.db.codecs import decode_value, get_codec
+
+ROUNDS = 50000
+
+def stored_size(raw) -> int:
+    """Payload bytes held by Redis for one record (field names + values for hashes)"""
+    if isinstance(raw, dict):
+        return sum(len(str(k).encode()) + len(str(v).encode()) for k, v in raw.items())
+    return len(raw.encode() if isinstance(raw, str) else raw)
+
+def ops_per_sec(fn) -> float:
+    return ROUNDS / min(timeit.repeat(fn, number=ROUNDS, repeat=5))
+
+def main():
+    record = {
+        "value": "2KB3i5uLKhUcjUwq3poxHpuGGqBWYwtTk5eG9E5WnLG6",
+        "timestamp": datetime.now(timezone.utc)
+    }
+    print(f"RedisSchemas record codecs ({ROUNDS} rounds, best of 5)\n")
+    print(f"{'codec':<10} {'bytes/record':>12} {'encode/s':>12} {'decode/s':>12}")
+
+    for name in ("json", "msgpack", "hash"):
+        codec = get_codec(name)
+        raw = codec.encode(record)
+        if codec.uses_hash:
+            stored = {k: str(v) for k, v in raw.items()}
+            decode = lambda: codec.decode(stored)
+        else:
+            # What a client returns: str for the legacy text client, bytes for binary
+            stored = raw
+            decode = lambda: decode_value(stored)
+
+        encode_rate = ops_per_sec(lambda: codec.encode(record))
+        decode_rate = ops_per_sec(decode)
+        print(f"{name:<10} {stored_size(raw):>12} {encode_rate:>12,.0f} {decode_rate:>12,.0f}")
+
+if __name__ == "__main__":
+    main()
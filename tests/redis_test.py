@@ -1,19 +1,24 @@
 import asyncio
-from redis.asyncio import Redis
+import sys
 from datetime import datetime
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from app.core.config import get_settings
+from app.db.redis import get_redis
 
 async def test_redis_connection():
+    settings = get_settings()
     try:
-        # Create Redis connection
-        redis = Redis(
-            host='localhost',
-            port=6379,
-            db=0,
-            decode_responses=True
-        )
+        # Client for the configured backend (REDIS_BACKEND=memory needs no server)
+        redis = get_redis()
         
         # Test basic operations
-        print("Testing Redis connection...")
+        print(f"Testing Redis connection ({settings.REDIS_BACKEND} backend)...")
         
         # Test PING
         result = await redis.ping()
@@ -23,14 +28,30 @@ async def test_redis_connection():
         test_key = f"test_key_{datetime.now().timestamp()}"
         await redis.set(test_key, 'test_value', ex=60)  # 60s expiry
         value = await redis.get(test_key)
+        assert value == 'test_value'
         print(f"✓ SET/GET successful")
         
         # Test expiry
         ttl = await redis.ttl(test_key)
         print(f"✓ TTL working (expires in {ttl}s)")
         
+        # Test MGET and pipelines
+        pipe = redis.pipeline(transaction=False)
+        pipe.set(f"{test_key}:a", "1", ex=60)
+        pipe.set(f"{test_key}:b", "2", ex=60)
+        await pipe.execute()
+        values = await redis.mget([f"{test_key}:a", f"{test_key}:b"])
+        assert values == ["1", "2"]
+        print(f"✓ Pipeline/MGET successful")
+        
+        # Test sorted sets
+        zset_key = f"{test_key}:zset"
+        await redis.zadd(zset_key, {"low": 1, "high": 2})
+        assert await redis.zrange(zset_key, 0, -1) == ["low", "high"]
+        print(f"✓ Sorted sets working")
+        
         # Clean up
-        await redis.delete(test_key)
+        await redis.delete(test_key, f"{test_key}:a", f"{test_key}:b", zset_key)
         print(f"✓ DELETE successful")
         
         print("\n✨ All Redis tests passed!")
@@ -44,9 +65,10 @@ async def test_redis_connection():
         print("\nPlease check that Redis is running:")
         print("  macOS: brew services start redis")
         print("  Linux: sudo systemctl start redis-server")
+        print("or run without a server: REDIS_BACKEND=memory python -m tests.redis_test")
         return False
 
 if __name__ == "__main__":
     success = asyncio.run(test_redis_connection())
     if not success:
-        exit(1)
\ No newline at end of file
+        exit(1)
@@ -0,0 +1,126 @@
+import asyncio
+import json
+import sys
+import time
+import timeit
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import httpx
+from fastapi import FastAPI, Response
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+
+from app.api.v1.endpoints.demo import DemoResponse
+from app.core.responses import FastJSONResponse, ModelResponse
+from app.schemas import WSEvent, WSEventType, get_type_adapter
+
+ROUNDS = 20000
+REQUESTS = 2000
+
+def per_call_us(fn) -> float:
+    """Best-of-5 microseconds per call"""
+    return min(timeit.repeat(fn, number=ROUNDS, repeat=5)) / ROUNDS * 1e6
+
+async def per_call_us_async(fn, rounds: int = ROUNDS) -> float:
+    """Best-of-5 microseconds per awaited call"""
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            await fn()
+        best = min(best, time.perf_counter() - start)
+    return best / rounds * 1e6
+
+def print_row(name: str, baseline: str, slow_us: float, fast_us: float) -> None:
+    print(f"{name:<28} {baseline:>7} {slow_us:8.2f}us   fast {fast_us:8.2f}us   {slow_us / fast_us:5.1f}x")
+
+HEALTH = {
+    "service": "ok",
+    "redis": True,
+    "services": {
+        "uptime": 1234.5,
+        "websocket_clients": 3,
+        "websocket_registry": {"clients": 3, "traffic": {"messages_sent": 36, "bytes_sent": 12288}},
+        "services": {f"service{i}": {"status": "online", "uptime": 1200.0} for i in range(5)}
+    }
+}
+
+def build_app() -> FastAPI:
+    """The same handlers answered the way FastAPI does by default and the fast way"""
+    app = FastAPI()
+
+    @app.get("/model", response_model=DemoResponse)
+    async def model():
+        # FastAPI validates against response_model, then TypeAdapter.dump_json
+        return DemoResponse(demo="test")
+
+    @app.get("/model/fast", response_model=DemoResponse)
+    async def model_fast():
+        return ModelResponse(DemoResponse(demo="test"))
+
+    @app.get("/dict")
+    async def health():
+        # No response_model: jsonable_encoder, then json.dumps
+        return HEALTH
+
+    @app.get("/dict/fast")
+    async def health_fast():
+        return FastJSONResponse(HEALTH)
+
+    return app
+
+async def serialization(app: FastAPI) -> None:
+    """Only the serialization step of each route"""
+    field = next(route for route in app.routes if getattr(route, "path", None) == "/model").response_field
+    result = DemoResponse(demo="test")
+
+    async def fastapi_path():
+        return Response(await serialize_response(field=field, response_content=result, dump_json=True)).body
+
+    assert json.loads(await fastapi_path()) == json.loads(ModelResponse(result).body)
+    slow = await per_call_us_async(fastapi_path)
+    print_row("DemoResponse", "fastapi", slow, per_call_us(lambda: ModelResponse(result).body))
+
+    async def encoder_path():
+        return JSONResponse(await serialize_response(response_content=HEALTH)).body
+
+    assert json.loads(await encoder_path()) == json.loads(FastJSONResponse(HEALTH).body)
+    slow = await per_call_us_async(encoder_path)
+    print_row("/health dict", "fastapi", slow, per_call_us(lambda: FastJSONResponse(HEALTH).body))
+
+    # WebSocket event payload: the old model_dump + json.dumps path vs one cached dump_json
+    event = WSEvent(event_type=WSEventType.NEW_EVENT, data={"value": "demo", "n": 1}, timestamp=datetime.now(timezone.utc))
+    event_adapter = get_type_adapter(WSEvent)
+    assert json.loads(JSONResponse(event.model_dump(mode="json")).body) == json.loads(event_adapter.dump_json(event))
+    print_row(
+        "WSEvent", "stdlib",
+        per_call_us(lambda: JSONResponse(event.model_dump(mode="json")).body),
+        per_call_us(lambda: event_adapter.dump_json(event))
+    )
+
+async def requests(app: FastAPI) -> None:
+    """Whole requests through the ASGI app, routing and middleware included"""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name, path in (("DemoResponse", "/model"), ("/health dict", "/dict")):
+            slow_body = (await client.get(path)).json()
+            assert slow_body == (await client.get(path + "/fast")).json(), f"{name}: outputs differ"
+            slow = await per_call_us_async(lambda: client.get(path), REQUESTS)
+            fast = await per_call_us_async(lambda: client.get(path + "/fast"), REQUESTS)
+            print_row(name, "fastapi", slow, fast)
+
+async def main():
+    app = build_app()
+    print(f"Serialization time per response ({ROUNDS} rounds, best of 5)\n")
+    await serialization(app)
+    print(f"\nTime per request through httpx.ASGITransport ({REQUESTS} requests, best of 5)\n")
+    await requests(app)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,84 @@
+import asyncio
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# Add project root to Python path
+project_root = str(Path(__file__).parent.parent)
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from app.schemas import WSEvent, WSEventType
+from app.services.connections import ConnectionRegistry
+
+SIZES = (1000, 10000, 50000)
+DATA = {"value": "demo", "price": 1.2345, "tags": ["a", "b", "c"]}
+
+class FakeWebSocket:
+    """Socket whose sends complete immediately, or after `delay` seconds"""
+    __slots__ = ("delay",)
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+
+    async def send_text(self, text: str) -> None:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+
+    async def send_json(self, data) -> None:
+        # What starlette does for send_json
+        await self.send_text(json.dumps(data, separators=(",", ":")))
+
+def build_registry(sockets) -> ConnectionRegistry:
+    registry = ConnectionRegistry()
+    for i, websocket in enumerate(sockets):
+        registry.add(websocket, f"10.0.{i // 256 % 256}.{i % 256}")
+    return registry
+
+def memory_per_connection(n: int) -> float:
+    sockets = [FakeWebSocket() for _ in range(n)]
+    tracemalloc.start()
+    registry = build_registry(sockets)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(registry) == n
+    return current / n
+
+async def legacy_broadcast(sockets) -> None:
+    """The old BaseService path: model_dump() and send_json per client, one at a time"""
+    event = WSEvent(event_type=WSEventType.NEW_EVENT, data=DATA)
+    for websocket in sockets:
+        await websocket.send_json(event.model_dump())
+
+async def timed(coro) -> float:
+    start = time.perf_counter()
+    await coro
+    return time.perf_counter() - start
+
+async def fan_out(n: int, delay: float = 0.0, rounds: int = 5) -> None:
+    sockets = [FakeWebSocket(delay) for _ in range(n)]
+    registry = build_registry(sockets)
+
+    legacy = min([await timed(legacy_broadcast(sockets)) for _ in range(rounds)])
+    unified = min([await timed(registry.broadcast(WSEventType.NEW_EVENT, DATA)) for _ in range(rounds)])
+    label = f"{n} clients" + (f", {delay * 1000:.0f}ms sends" if delay else "")
+    print(
+        f"{label:<26} legacy {legacy * 1000:9.2f}ms ({legacy / n * 1e6:6.2f}us/client)   "
+        f"registry {unified * 1000:8.2f}ms ({unified / n * 1e6:6.2f}us/client)   {legacy / unified:5.1f}x"
+    )
+
+async def main():
+    print("Registry memory per connection (WebSocketConnection + indexes, socket excluded)\n")
+    for n in SIZES:
+        print(f"{n:>6} clients   {memory_per_connection(n):7.0f} bytes/connection")
+
+    print("\nBroadcast fan-out, best of 5\n")
+    for n in SIZES:
+        await fan_out(n)
+    # Sends that actually wait on the network: sequential sends add up, concurrent ones overlap
+    await fan_out(1000, delay=0.001, rounds=1)
+
+if __name__ == "__main__":
+    asyncio.run(main())